@@ -0,0 +1,149 @@
+import argparse
+import os
+import re
+from multiprocessing import Pool
+import time
+from collections import Counter
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+from nltk.stem import WordNetLemmatizer
+from utils import TextPreprocessor, clean_text, fast_tokenize
+from data_preprocessing import init_worker, preprocess_texts
+
+# word_tokenize without the sentence splitter, which needs NLTK's punkt data. Every
+# text tokenized here has been cleaned of punctuation, so the splitter would leave
+# it as one sentence and the tokens are the same.
+def treebank_tokenize(text):
+    return word_tokenize(text, preserve_line=True)
+
+def legacy_preprocess_text(text):
+    """
+    The original preprocessing pipeline: five regex passes, and the stopword
+    set and lemmatizer rebuilt on every call
+    """
+    if isinstance(text, str):
+        text = text.lower()
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = re.sub(r'@\w+|\#\w+', '', text)
+        text = re.sub(r'[^\w\s]', '', text)
+        text = re.sub(r'\d+', '', text)
+        text = re.sub(r'\s+', ' ', text).strip()
+    else:
+        text = ""
+    tokens = treebank_tokenize(text)
+    stop_words = set(stopwords.words('english'))
+    tokens = [word for word in tokens if word not in stop_words]
+    lemmatizer = WordNetLemmatizer()
+    return ' '.join(lemmatizer.lemmatize(word) for word in tokens)
+
+def load_texts(path, rows=None):
+    """
+    Load raw texts and their saved preprocessed form
+    """
+    data = pd.read_csv(path, nrows=rows)
+    return data['text'].tolist(), data['processed_text'].fillna('').tolist()
+
+def time_pipeline(name, function, texts):
+    """
+    Run a preprocessing function over every text and report documents per second
+    """
+    start = time.perf_counter()
+    results = [function(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<18} {len(texts) / elapsed:10.0f} docs/sec ({elapsed:.2f}s)")
+    return results, elapsed
+
+def check_parity(name, results, expected, texts):
+    """
+    Count and show rows whose output differs from the expected text
+    """
+    mismatches = [i for i, (result, reference) in enumerate(zip(results, expected)) if result != reference]
+    print(f"{name}: {len(results) - len(mismatches)}/{len(results)} rows identical")
+    for i in mismatches[:5]:
+        print(f"  row {i}: {texts[i]!r}")
+        print(f"    expected: {expected[i]!r}")
+        print(f"    got:      {results[i]!r}")
+    return not mismatches
+
+def compare_tokenizers(path):
+    """
+    Tokenize the cleaned texts of a CSV with word_tokenize and with fast_tokenize,
+    reporting the speed of each and every token on which they disagree
+    """
+    texts = [clean_text(text) for text in pd.read_csv(path)['text']]
+    print(f"\nTokenizers on {len(texts)} cleaned rows of {path}")
+    reference, reference_time = time_pipeline("word_tokenize", treebank_tokenize, texts)
+    fast, fast_time = time_pipeline("fast_tokenize", fast_tokenize, texts)
+    print(f"Speedup: {reference_time / fast_time:.1f}x")
+
+    missing = Counter()
+    extra = Counter()
+    rows = 0
+    for expected, tokens in zip(reference, fast):
+        if expected != tokens:
+            rows += 1
+            missing.update(Counter(expected) - Counter(tokens))
+            extra.update(Counter(tokens) - Counter(expected))
+    print(f"{len(texts) - rows}/{len(texts)} rows tokenized identically")
+    if rows:
+        print(f"  word_tokenize only: {missing.most_common(10)}")
+        print(f"  fast_tokenize only: {extra.most_common(10)}")
+    return rows == 0
+
+def scale_workers(texts, worker_counts, chunk_size, fast_tokenizer=False):
+    """
+    Time preprocess_texts with each worker count (pool start-up included) and
+    check that every run returns the single-process output in row order
+    """
+    series = pd.Series(texts)
+    print(f"\nWorker scaling on {len(texts)} rows, chunk size {chunk_size}, "
+          f"{os.cpu_count()} CPUs, fast tokenizer {fast_tokenizer}")
+    baseline = None
+    identical = True
+    for n_workers in worker_counts:
+        start = time.perf_counter()
+        if n_workers > 1:
+            with Pool(n_workers, initializer=init_worker, initargs=(fast_tokenizer,)) as pool:
+                result = preprocess_texts(series, pool, chunk_size, fast_tokenizer)
+        else:
+            result = preprocess_texts(series, fast_tokenizer=fast_tokenizer)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline, baseline_time = result, elapsed
+        same = result.equals(baseline)
+        identical &= same
+        print(f"{n_workers:>3} workers {len(texts) / elapsed:10.0f} docs/sec ({elapsed:.2f}s) "
+              f"speedup {baseline_time / elapsed:4.1f}x{'' if same else '  OUTPUT DIFFERS'}")
+    return identical
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text preprocessing and check it against saved output.")
+    parser.add_argument('--csv', default='preprocessed_test.csv', help="CSV with 'text' and 'processed_text' columns")
+    parser.add_argument('--rows', type=int, default=None, help="only use the first N rows")
+    parser.add_argument('--tokenizer-csv', default='x_test.csv', help="CSV whose texts compare the tokenizers")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help="worker counts to compare")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    texts, expected = load_texts(args.csv, args.rows)
+    print(f"Loaded {len(texts)} rows from {args.csv}")
+
+    legacy, legacy_time = time_pipeline("legacy", legacy_preprocess_text, texts)
+    preprocessor = TextPreprocessor()
+    fast, fast_time = time_pipeline("TextPreprocessor", preprocessor.process, texts)
+    print(f"Speedup: {legacy_time / fast_time:.1f}x, lemma cache: {preprocessor.lemmatize.cache_info()}")
+    tokenizer, tokenizer_time = time_pipeline("fast tokenizer", TextPreprocessor(fast_tokenizer=True).process, texts)
+    print(f"Speedup: {legacy_time / tokenizer_time:.1f}x")
+
+    identical = check_parity("TextPreprocessor vs saved output", fast, expected, texts)
+    identical &= check_parity("TextPreprocessor vs legacy pipeline", fast, legacy, texts)
+    identical &= check_parity("Fast tokenizer vs legacy pipeline", tokenizer, legacy, texts)
+    identical &= compare_tokenizers(args.tokenizer_csv)
+    identical &= scale_workers(texts, args.workers, args.chunk_size)
+    identical &= scale_workers(texts, args.workers, args.chunk_size, fast_tokenizer=True)
+    print("Parity check passed" if identical else "Parity check FAILED")
+    return 0 if identical else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
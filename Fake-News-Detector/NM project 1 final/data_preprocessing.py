@@ -1,6 +1,8 @@
+import argparse
 import os
+from multiprocessing import Pool
 import pandas as pd
-from utils import preprocess_text
+from utils import preprocess_text, TextPreprocessor
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -56,15 +58,61 @@ def explore_data(train_data):
     
     return class_distribution
 
-def preprocess_data(train_data, test_data):
+# TextPreprocessor of a worker process, created by init_worker
+_worker_preprocessor = None
+
+def init_worker(fast_tokenizer=False):
     """
-    Preprocess the text data
+    Load the NLTK resources once per worker process
+    """
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(fast_tokenizer=fast_tokenizer)
+    # Tokenizer and WordNet data load lazily; pay for that here, not in the first chunk
+    _worker_preprocessor.process("loading resources")
+
+def preprocess_chunk(texts):
+    """
+    Preprocess one chunk of texts in a worker process
+    """
+    return [_worker_preprocessor.process(text) for text in texts]
+
+def preprocess_texts(texts, pool=None, chunk_size=500, fast_tokenizer=False):
     """
-    print("Preprocessing training data...")
-    train_data['processed_text'] = train_data['text'].apply(preprocess_text)
+    Preprocess a Series of texts, split into chunks across a worker pool if one is given
     
-    print("Preprocessing test data...")
-    test_data['processed_text'] = test_data['text'].apply(preprocess_text)
+    The result keeps the row order and index of the input.
+    """
+    if pool is None:
+        return texts.apply(preprocess_text, fast_tokenizer=fast_tokenizer)
+    
+    values = texts.tolist()
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    # map returns the chunk results in submission order
+    processed = [text for chunk in pool.map(preprocess_chunk, chunks) for text in chunk]
+    return pd.Series(processed, index=texts.index, name=texts.name)
+
+def preprocess_data(train_data, test_data, n_workers=1, chunk_size=500, fast_tokenizer=False):
+    """
+    Preprocess the text data
+    
+    With n_workers > 1 the rows are processed in chunks of chunk_size by a
+    pool of worker processes, each loading the NLTK resources once.
+    """
+    pool = None
+    if n_workers > 1:
+        print(f"Starting {n_workers} worker processes...")
+        pool = Pool(n_workers, initializer=init_worker, initargs=(fast_tokenizer,))
+    
+    try:
+        print("Preprocessing training data...")
+        train_data['processed_text'] = preprocess_texts(train_data['text'], pool, chunk_size, fast_tokenizer)
+        
+        print("Preprocessing test data...")
+        test_data['processed_text'] = preprocess_texts(test_data['text'], pool, chunk_size, fast_tokenizer)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
     
     # Save preprocessed data
     train_data.to_csv('preprocessed_train.csv', index=False)
@@ -75,6 +123,13 @@ def preprocess_data(train_data, test_data):
     return train_data, test_data
 
 def main():
+    parser = argparse.ArgumentParser(description="Clean, tokenize and lemmatize the datasets.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes; 0 uses every CPU (default: 1, no pool)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="rows per worker task")
+    args = parser.parse_args()
+    n_workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    
     print("Starting data preprocessing...")
     
     # Load data
@@ -84,7 +139,7 @@ def main():
     explore_data(train_data)
     
     # Preprocess data
-    preprocessed_train, preprocessed_test = preprocess_data(train_data, test_data)
+    preprocessed_train, preprocessed_test = preprocess_data(train_data, test_data, n_workers, args.chunk_size)
     
     print("Data preprocessing completed successfully.")
 
@@ -0,0 +1,76 @@
+import os
+import re
+
+import nltk
+import pandas as pd
+import pytest
+from nltk.tokenize import word_tokenize
+
+from utils import clean_text, fast_tokenize
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EDGE_CASES = [
+    "Check https://example.com/a?b=1 and www.site.org now!",
+    "@user#tag @userhttp://x.co/1 #hashtag_2 hello",
+    "Prices rose 12.5% in 2023 -- shocking!!!",
+    "I cannot believe they're gonna wanna gimme that, lemme see; gotta go",
+    "   lots\tof \n whitespace   ",
+    "Obama’s café naïve résumé",
+    "",
+    None,
+    42,
+]
+
+def has_data(resource):
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        return False
+    return True
+
+def legacy_clean_text(text):
+    """
+    The original five-pass cleaning
+    """
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'@\w+|\#\w+', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+@pytest.fixture(scope="module")
+def texts():
+    return pd.read_csv(os.path.join(PROJECT_DIR, 'x_test.csv'))['text'].tolist() + EDGE_CASES
+
+def test_clean_text_matches_five_regex_passes(texts):
+    for text in texts:
+        assert clean_text(text) == legacy_clean_text(text), text
+
+def test_fast_tokenize_matches_word_tokenize(texts):
+    # Without the sentence splitter, so the punkt data need not be installed
+    for text in texts:
+        cleaned = clean_text(text)
+        assert fast_tokenize(cleaned) == word_tokenize(cleaned, preserve_line=True), cleaned
+
+def test_fast_tokenize_splits_treebank_contractions():
+    assert fast_tokenize("i cannot wanna gonna") == ["i", "can", "not", "wan", "na", "gon", "na"]
+
+@pytest.mark.skipif(not has_data('tokenizers/punkt_tab'), reason="NLTK punkt_tab data is not installed")
+def test_fast_tokenize_matches_word_tokenize_with_sentence_splitting(texts):
+    for text in texts:
+        cleaned = clean_text(text)
+        assert fast_tokenize(cleaned) == word_tokenize(cleaned), cleaned
+
+@pytest.mark.skipif(not (has_data('corpora/stopwords') and has_data('corpora/wordnet')),
+                    reason="NLTK stopwords and wordnet data are not installed")
+def test_preprocessors_match_saved_output():
+    from utils import TextPreprocessor
+    data = pd.read_csv(os.path.join(PROJECT_DIR, 'preprocessed_test.csv'))
+    expected = data['processed_text'].fillna('').tolist()
+    for fast_tokenizer in (False, True):
+        preprocessor = TextPreprocessor(fast_tokenizer=fast_tokenizer)
+        assert [preprocessor.process(text) for text in data['text']] == expected
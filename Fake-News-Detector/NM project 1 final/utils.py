@@ -1,5 +1,6 @@
 import re
 import nltk
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -20,32 +21,99 @@ except LookupError:
     nltk.download('stopwords')
     nltk.download('wordnet')
 
+# URLs, user mentions, hashtags, punctuation and digits, removed in one pass.
+# A mention or hashtag stops where a URL starts ("@userhttp://..."), so the
+# result matches removing URLs first, then mentions and hashtags, then
+# punctuation, then numbers.
+CLEAN_PATTERN = re.compile(r'http\S+|www\S+|[@#](?:(?!http\S|www\S)\w)+|[^\w\s]|\d')
+
 def clean_text(text):
     """
     Clean and preprocess text data
     """
     if isinstance(text, str):
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        
-        # Remove user mentions and hashtags
-        text = re.sub(r'@\w+|\#\w+', '', text)
-        
-        # Remove punctuation and special characters
-        text = re.sub(r'[^\w\s]', '', text)
-        
-        # Remove numbers
-        text = re.sub(r'\d+', '', text)
+        # Convert to lowercase, remove URLs, mentions, hashtags, punctuation and numbers
+        text = CLEAN_PATTERN.sub('', text.lower())
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return ' '.join(text.split())
     return ""
 
+# The only word_tokenize rules that can still fire on cleaned text (no
+# punctuation left): Treebank splits these words in two. Cleaned text is
+# lower case and every token is all word characters, so each rule matches
+# exactly a whole token.
+SPLIT_CONTRACTIONS = {
+    'cannot': ('can', 'not'), 'gimme': ('gim', 'me'), 'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'), 'lemme': ('lem', 'me'), 'wanna': ('wan', 'na'),
+}
+
+def fast_tokenize(text):
+    """
+    Tokenize cleaned text (see clean_text) into the same words as word_tokenize, without NLTK
+    """
+    tokens = text.split()
+    if SPLIT_CONTRACTIONS.keys().isdisjoint(tokens):
+        return tokens
+    return [part for token in tokens for part in SPLIT_CONTRACTIONS.get(token, (token,))]
+
+class TextPreprocessor:
+    """
+    Text preprocessing pipeline that loads its resources once
+    
+    Holds the English stopwords as a frozenset and one WordNet lemmatizer
+    whose results are memoized per token in a bounded LRU cache, so
+    repeated calls (training, every prediction) skip the setup work that
+    the standalone functions below used to repeat. With fast_tokenizer=True
+    cleaned text is split by fast_tokenize() instead of NLTK word_tokenize.
+    """
+    def __init__(self, lemma_cache_size=100000, fast_tokenizer=False):
+        self.fast_tokenizer = fast_tokenizer
+        self.stop_words = frozenset(stopwords.words('english'))
+        self.lemmatizer = WordNetLemmatizer()
+        self.lemmatize = lru_cache(maxsize=lemma_cache_size)(self.lemmatizer.lemmatize)
+    
+    def tokenize(self, text):
+        """
+        Tokenize text into words
+        """
+        if self.fast_tokenizer:
+            return fast_tokenize(text)
+        # Cleaned text has no sentence punctuation left, so splitting it into
+        # sentences first (which needs the punkt data) would not change anything
+        return word_tokenize(text, preserve_line=True)
+    
+    def remove_stopwords(self, tokens):
+        """
+        Remove stopwords from tokenized text
+        """
+        stop_words = self.stop_words
+        return [word for word in tokens if word not in stop_words]
+    
+    def lemmatize_tokens(self, tokens):
+        """
+        Lemmatize tokens to their root form
+        """
+        lemmatize = self.lemmatize
+        return [lemmatize(word) for word in tokens]
+    
+    def process(self, text):
+        """
+        Complete text preprocessing pipeline
+        """
+        tokens = self.tokenize(clean_text(text))
+        return ' '.join(self.lemmatize_tokens(self.remove_stopwords(tokens)))
+
+_preprocessors = {}
+
+def get_preprocessor(fast_tokenizer=False):
+    """
+    Shared TextPreprocessor for a tokenizer mode, created on first use
+    """
+    if fast_tokenizer not in _preprocessors:
+        _preprocessors[fast_tokenizer] = TextPreprocessor(fast_tokenizer=fast_tokenizer)
+    return _preprocessors[fast_tokenizer]
+
 def tokenize_text(text):
     """
     Tokenize text into words
@@ -56,25 +124,22 @@ def remove_stopwords(tokens):
     """
     Remove stopwords from tokenized text
     """
-    stop_words = set(stopwords.words('english'))
-    return [word for word in tokens if word not in stop_words]
+    return get_preprocessor().remove_stopwords(tokens)
 
 def lemmatize_tokens(tokens):
     """
     Lemmatize tokens to their root form
     """
-    lemmatizer = WordNetLemmatizer()
-    return [lemmatizer.lemmatize(word) for word in tokens]
+    return get_preprocessor().lemmatize_tokens(tokens)
 
-def preprocess_text(text):
+def preprocess_text(text, fast_tokenizer=False):
     """
     Complete text preprocessing pipeline
+    
+    fast_tokenizer=True splits the cleaned text with fast_tokenize(), which
+    gives the same tokens as word_tokenize without running NLTK.
     """
-    text = clean_text(text)
-    tokens = tokenize_text(text)
-    tokens = remove_stopwords(tokens)
-    tokens = lemmatize_tokens(tokens)
-    return ' '.join(tokens)
+    return get_preprocessor(fast_tokenizer).process(text)
 
 def plot_confusion_matrix(y_true, y_pred, classes):
     """ 
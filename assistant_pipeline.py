@@ -0,0 +1,135 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Queued after the final reply to shut the pipeline down
+_STOP = object()
+# Returned by the capture stage when nothing usable was captured
+_NO_AUDIO = object()
+
+class AssistantPipeline:
+    """
+    Pipelined asyncio listen -> recognize -> respond loop for a VoiceAssistant.
+
+    Capture, recognition, dispatch and speech run as separate stages joined by
+    bounded queues, each blocking stage on its own worker thread. The next
+    utterance is captured while the current one is still being recognized or
+    spoken, and with barge_in enabled, new speech cancels a reply that is
+    still playing. Disable barge_in when the microphone can hear the speakers.
+    """
+    def __init__(self, assistant, queue_size=2, barge_in=True):
+        self.assistant = assistant
+        self.queue_size = queue_size
+        self.barge_in = barge_in
+        self._speech = None
+        self._barged_in = False
+
+    async def run(self, greeting=None):
+        """
+        Run all stages until the assistant is stopped
+        """
+        self._loop = asyncio.get_running_loop()
+        self._audio_queue = asyncio.Queue(self.queue_size)
+        self._text_queue = asyncio.Queue(self.queue_size)
+        self._speech_queue = asyncio.Queue(self.queue_size)
+        self._stopped = asyncio.Event()
+
+        # One thread per blocking stage keeps utterances in order and stages independent
+        self._executors = {stage: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"assistant-{stage}")
+                           for stage in ("capture", "recognize", "dispatch", "speech")}
+
+        if greeting:
+            await self._speech_queue.put(greeting)
+
+        tasks = [
+            asyncio.create_task(self._capture_stage()),
+            asyncio.create_task(self._recognize_stage()),
+            asyncio.create_task(self._dispatch_stage()),
+            asyncio.create_task(self._speech_stage()),
+        ]
+
+        try:
+            await self._stopped.wait()
+        finally:
+            self.assistant.is_active = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for executor in self._executors.values():
+                # A capture call may still be waiting on the microphone; don't block on it
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_blocking(self, stage, func, *args):
+        return self._loop.run_in_executor(self._executors[stage], func, *args)
+
+    def _capture(self):
+        try:
+            return self.assistant.capture()
+        except Exception as e:
+            self.assistant.report_listen_error(e)
+            return _NO_AUDIO
+
+    def _recognize(self, audio):
+        try:
+            return self.assistant.recognize(audio)
+        except Exception as e:
+            self.assistant.report_listen_error(e)
+            return None
+
+    async def _capture_stage(self):
+        while self.assistant.is_active:
+            audio = await self._run_blocking("capture", self._capture)
+            if audio is _NO_AUDIO or not self.assistant.is_active:
+                continue
+            if self.barge_in and audio is not None:
+                self.interrupt()
+            await self._audio_queue.put(audio)
+
+    async def _recognize_stage(self):
+        while True:
+            audio = await self._audio_queue.get()
+            text = await self._run_blocking("recognize", self._recognize, audio)
+            if text:
+                await self._text_queue.put(text)
+
+    async def _dispatch_stage(self):
+        while True:
+            text = await self._text_queue.get()
+            response = await self._run_blocking("dispatch", self.assistant.process_command, text)
+            await self._speech_queue.put(response)
+
+            # If stop command was issued, finish speaking the reply and shut down
+            if not self.assistant.is_active:
+                await self._speech_queue.put(_STOP)
+                return
+
+    async def _speech_stage(self):
+        while True:
+            text = await self._speech_queue.get()
+            if text is _STOP:
+                self._stopped.set()
+                return
+
+            self._speech = self._run_blocking("speech", self.assistant.speak, text)
+            try:
+                await self._speech
+            except asyncio.CancelledError:
+                # Cancelled by barge-in: move on to the next reply
+                if not self._barged_in:
+                    raise
+            finally:
+                self._speech = None
+                self._barged_in = False
+
+    def interrupt(self):
+        """
+        Barge-in: stop the reply that is playing and drop replies not yet spoken
+        """
+        while not self._speech_queue.empty():
+            if self._speech_queue.get_nowait() is _STOP:
+                self._speech_queue.put_nowait(_STOP)
+                break
+
+        if self._speech is not None and not self._speech.done():
+            self._barged_in = True
+            self.assistant.stop_speaking()
+            self._speech.cancel()
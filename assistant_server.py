@@ -0,0 +1,348 @@
+"""
+Multi-client assistant server over HTTP and WebSocket.
+
+One headless VoiceAssistant holds the compiled command index, fuzzy index
+and intent classifier. They are built once and only read afterwards. Every
+client gets its own AssistantSession, so "stop" ends that session and not
+the server. Commands run on a fixed-size thread pool. Once `max_pending`
+commands are queued, new ones are refused with 503, so the backlog stays
+bounded.
+
+    POST   /sessions                  -> {"session": id}
+    POST   /sessions/<id>/command     {"text": ...} -> reply
+    DELETE /sessions/<id>
+    GET    /ws                        WebSocket: one session per connection,
+                                      each text frame is a command
+    GET    /metrics                   stage latencies (Prometheus text)
+    GET    /health
+
+    python assistant_server.py --port 8765 --workers 8
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY_BYTES = 64 * 1024
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 503: "Service Unavailable"}
+
+class ServerBusy(Exception):
+    """Too many commands are already queued"""
+
+class AssistantSession:
+    """
+    Per-client conversation state: whether it is still active and its recent turns
+    """
+    def __init__(self, session_id, handlers, history=20):
+        self.session_id = session_id
+        self.is_active = True
+        self.turns = 0
+        self.last_resolution = None
+        self.history = deque(maxlen=history)
+        self.created = self.last_seen = time.monotonic()
+        # The shared handlers, with "stop" ending this session instead of the assistant
+        self.handlers = dict(handlers, stop=self.stop)
+
+    def stop(self):
+        self.is_active = False
+        return "Stopping the voice assistant. Goodbye!"
+
+class AssistantServer:
+    """
+    asyncio HTTP/WebSocket front end sharing one assistant between many sessions
+    """
+    def __init__(self, assistant=None, host="127.0.0.1", port=8765, max_workers=8, max_pending=256,
+                 max_sessions=10000, session_ttl=600):
+        if assistant is None:
+            from v_assis import VoiceAssistant
+            assistant = VoiceAssistant("Vira", headless=True)
+        self.assistant = assistant
+        # Build the lazily constructed tiers now, before threads share them
+        assistant.fuzzy_index.build()
+        assistant.intent_classifier.build()
+
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sessions = {}
+        self.stats = {"sessions": 0, "commands": 0, "rejected": 0, "expired": 0}
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="assistant")
+        self._pending = 0
+        self._server = None
+
+    def create_session(self):
+        """
+        Open a new session, expiring idle ones first if the server is full
+        """
+        if len(self.sessions) >= self.max_sessions:
+            self.expire_sessions()
+            if len(self.sessions) >= self.max_sessions:
+                raise ServerBusy("too many sessions")
+        session = AssistantSession(uuid.uuid4().hex, self.assistant.handlers)
+        self.sessions[session.session_id] = session
+        self.stats["sessions"] += 1
+        return session
+
+    def close_session(self, session_id):
+        return self.sessions.pop(session_id, None) is not None
+
+    def expire_sessions(self):
+        """
+        Drop sessions idle for longer than session_ttl
+        """
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id in [s.session_id for s in self.sessions.values() if s.last_seen < cutoff]:
+            del self.sessions[session_id]
+            self.stats["expired"] += 1
+
+    def _process(self, session, text):
+        """
+        Resolve one command for a session (runs on the worker pool)
+        """
+        response, resolution = self.assistant.resolve_command(text, session.handlers)
+        session.turns += 1
+        session.last_resolution = resolution
+        session.history.append((text, response))
+        tier, action = resolution if resolution else (None, None)
+        return {"session": session.session_id, "text": text, "response": response,
+                "intent": action.intent if action else None, "tier": tier, "active": session.is_active}
+
+    async def command(self, session, text):
+        """
+        Run a command on the bounded worker pool and return the reply dict
+        """
+        if self._pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise ServerBusy("command queue is full")
+        session.last_seen = time.monotonic()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            reply = await loop.run_in_executor(self._executor, self._process, session, text)
+        finally:
+            self._pending -= 1
+        self.stats["commands"] += 1
+        if not session.is_active:
+            self.close_session(session.session_id)
+        return reply
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_BODY_BYTES)
+        # Report the real port when started on port 0
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.ensure_future(self._sweep())
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Assistant server listening on http://{self.host}:{self.port} "
+              f"({self.max_workers} workers)")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._sweeper.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(min(60, self.session_ttl))
+            self.expire_sessions()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, headers)
+                    break
+                status, payload, content_type = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._respond(writer, status, payload, content_type, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except asyncio.LimitOverrunError:
+            self._respond(writer, 413, {"error": "request too large"}, keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"Error handling connection: {e}")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        Parse one HTTP/1.1 request into (method, path, headers, body); None at end of stream
+        """
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise asyncio.LimitOverrunError("request body too large", length)
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    def _respond(self, writer, status, payload, content_type="application/json", keep_alive=True):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                     f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+
+    async def _route(self, method, path, body):
+        """
+        Dispatch a request; returns (status, payload, content type)
+        """
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+        try:
+            if parts == ["health"]:
+                return 200, {"status": "ok", "sessions": len(self.sessions), "pending": self._pending}, "application/json"
+            if parts == ["metrics"]:
+                return 200, self.assistant.metrics.to_prometheus(), "text/plain; version=0.0.4"
+            if parts == ["sessions"] and method == "POST":
+                return 201, {"session": self.create_session().session_id}, "application/json"
+            if len(parts) >= 2 and parts[0] == "sessions":
+                session = self.sessions.get(parts[1])
+                if session is None:
+                    return 404, {"error": "unknown or closed session"}, "application/json"
+                if len(parts) == 2 and method == "DELETE":
+                    self.close_session(session.session_id)
+                    return 200, {"closed": session.session_id}, "application/json"
+                if parts[2:] == ["command"] and method == "POST":
+                    text = self._command_text(body)
+                    if text is None:
+                        return 400, {"error": "expected a JSON body with a 'text' string"}, "application/json"
+                    return 200, await self.command(session, text), "application/json"
+                return 405, {"error": "method not allowed"}, "application/json"
+        except ServerBusy as e:
+            return 503, {"error": str(e)}, "application/json"
+        return 404, {"error": "not found"}, "application/json"
+
+    @staticmethod
+    def _command_text(body):
+        try:
+            text = json.loads(body or b"{}").get("text")
+        except (ValueError, AttributeError):
+            return None
+        return text if isinstance(text, str) else None
+
+    async def _websocket(self, reader, writer, headers):
+        """
+        Serve one session over a WebSocket (RFC 6455, unfragmented text frames)
+        """
+        key = headers.get("sec-websocket-key", "").encode()
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest()).decode()
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     + f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+
+        try:
+            session = self.create_session()
+        except ServerBusy as e:
+            self._send_frame(writer, 0x8, struct.pack("!H", 1013) + str(e).encode())
+            await writer.drain()
+            return
+        self._send_frame(writer, 0x1, json.dumps({"session": session.session_id}).encode())
+
+        try:
+            while session.is_active:
+                opcode, payload = await self._read_frame(reader)
+                if opcode == 0x8:
+                    self._send_frame(writer, 0x8, payload[:2])
+                    break
+                if opcode == 0x9:
+                    self._send_frame(writer, 0xA, payload)
+                elif opcode == 0x1:
+                    text = payload.decode("utf-8", "replace")
+                    if text.startswith("{"):
+                        text = self._command_text(payload)
+                    if text is None:
+                        reply = {"error": "expected text or a JSON object with a 'text' string"}
+                    else:
+                        try:
+                            reply = await self.command(session, text)
+                        except ServerBusy as e:
+                            reply = {"error": str(e)}
+                    self._send_frame(writer, 0x1, json.dumps(reply).encode())
+                await writer.drain()
+            if not session.is_active:
+                self._send_frame(writer, 0x8, struct.pack("!H", 1000))
+                await writer.drain()
+        finally:
+            self.close_session(session.session_id)
+
+    async def _read_frame(self, reader):
+        """
+        Read one (unfragmented) client frame and return (opcode, unmasked payload)
+        """
+        first, second = await reader.readexactly(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if length > MAX_BODY_BYTES:
+            raise ConnectionError("WebSocket frame too large")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return opcode, payload
+
+    @staticmethod
+    def _send_frame(writer, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        writer.write(header + payload)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the assistant over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8, help="threads running commands")
+    parser.add_argument("--max-pending", type=int, default=256, help="queued commands before 503")
+    parser.add_argument("--session-ttl", type=float, default=600, help="idle seconds before a session expires")
+    args = parser.parse_args(argv)
+
+    server = AssistantServer(host=args.host, port=args.port, max_workers=args.workers,
+                             max_pending=args.max_pending, session_ttl=args.session_ttl)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(f"Server stopped: {server.stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
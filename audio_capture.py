@@ -0,0 +1,255 @@
+import math
+import queue
+import threading
+from collections import namedtuple
+
+# Absolute byte positions of one segmented utterance in the ring buffer
+Utterance = namedtuple("Utterance", ["start", "end"])
+
+# array/memoryview format codes for signed PCM samples of each width
+SAMPLE_FORMATS = {1: "b", 2: "h", 4: "i"}
+
+def rms(frame, sample_width):
+    """
+    RMS energy of a buffer of signed PCM samples
+    """
+    samples = memoryview(frame).cast("B").cast(SAMPLE_FORMATS[sample_width])
+    if not len(samples):
+        return 0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+class AudioRingBuffer:
+    """
+    Fixed-size mirrored ring buffer of raw PCM bytes.
+
+    Every write lands twice, at its position and one capacity further on, so
+    any window of up to `capacity` bytes is a single contiguous slice. Readers
+    get memoryview slices without copying, even across the wrap point.
+    Positions are absolute byte counts since the stream started.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.written = 0
+        self._data = bytearray(2 * capacity)
+        self._view = memoryview(self._data)
+
+    def write(self, chunk):
+        """
+        Append raw bytes, overwriting the oldest data once the buffer is full
+        """
+        chunk = memoryview(chunk).cast("B")
+        if len(chunk) > self.capacity:
+            self.written += len(chunk) - self.capacity
+            chunk = chunk[-self.capacity:]
+
+        position = self.written % self.capacity
+        first = min(len(chunk), self.capacity - position)
+        self._view[position:position + first] = chunk[:first]
+        self._view[position + self.capacity:position + self.capacity + first] = chunk[:first]
+
+        rest = len(chunk) - first
+        if rest:
+            self._view[:rest] = chunk[first:]
+            self._view[self.capacity:self.capacity + rest] = chunk[first:]
+
+        self.written += len(chunk)
+
+    def is_available(self, start, end):
+        """
+        True while the window is fully written and not yet overwritten
+        """
+        return self.written - self.capacity <= start <= end <= self.written
+
+    def view(self, start, end):
+        """
+        Zero-copy view of the bytes between two absolute positions
+        """
+        if not self.is_available(start, end):
+            raise ValueError(f"Audio window {start}-{end} is no longer in the ring buffer")
+        offset = start % self.capacity
+        return self._view[offset:offset + (end - start)]
+
+class EnergySegmenter:
+    """
+    Energy-based voice activity segmenter.
+
+    Frames whose RMS energy exceeds the threshold open an utterance (including
+    a short pre-roll so soft onsets are kept); it closes after `pause_frames`
+    consecutive quiet frames or when it reaches `max_frames`. While quiet, the
+    threshold follows the ambient level the same way speech_recognition's
+    dynamic energy threshold does.
+    """
+    def __init__(self, frame_bytes, sample_width, energy_threshold=300, pause_frames=27,
+                 pre_roll_frames=10, min_speech_frames=5, max_frames=500, dynamic_threshold=True,
+                 seconds_per_frame=0.03):
+        self.frame_bytes = frame_bytes
+        self.sample_width = sample_width
+        self.energy_threshold = energy_threshold
+        self.pause_frames = pause_frames
+        self.pre_roll_frames = pre_roll_frames
+        self.min_speech_frames = min_speech_frames
+        self.max_frames = max_frames
+        self.dynamic_threshold = dynamic_threshold
+        # Same adjustment rate as sr.Recognizer's dynamic energy threshold
+        self.dynamic_damping = 0.15 ** seconds_per_frame
+        self.dynamic_ratio = 1.5
+        self._reset()
+
+    def _reset(self):
+        self._start = None
+        self._speech_frames = 0
+        self._quiet_frames = 0
+
+    def process(self, position, frame):
+        """
+        Feed one frame starting at an absolute position; return an Utterance when one ends
+        """
+        energy = rms(frame, self.sample_width)
+        end = position + len(frame)
+
+        if self._start is None:
+            if energy > self.energy_threshold:
+                self._start = max(0, position - self.pre_roll_frames * self.frame_bytes)
+                self._speech_frames = 1
+            elif self.dynamic_threshold:
+                # Ease the threshold toward the ambient level
+                target = energy * self.dynamic_ratio
+                self.energy_threshold = (self.energy_threshold * self.dynamic_damping
+                                         + target * (1 - self.dynamic_damping))
+            return None
+
+        if energy > self.energy_threshold:
+            self._speech_frames += 1
+            self._quiet_frames = 0
+        else:
+            self._quiet_frames += 1
+
+        frames = (end - self._start) // self.frame_bytes
+        if self._quiet_frames < self.pause_frames and frames < self.max_frames:
+            return None
+
+        utterance = Utterance(self._start, end - self._quiet_frames * self.frame_bytes)
+        enough_speech = self._speech_frames >= self.min_speech_frames
+        self._reset()
+        return utterance if enough_speech else None
+
+class MicrophoneStream:
+    """
+    Long-lived microphone capture with voice-activity segmentation.
+
+    The microphone is opened once and a daemon thread keeps reading it into a
+    mirrored ring buffer, so nothing said between commands is lost and no
+    device open/close happens per turn. Segmented utterances are handed out as
+    AudioData backed by zero-copy memoryview slices of the ring; consume them
+    within `buffer_seconds` of capture, before the ring wraps over them.
+    """
+    def __init__(self, microphone=None, buffer_seconds=30, frame_ms=30, energy_threshold=300,
+                 pause_seconds=0.8, pre_roll_seconds=0.3, min_speech_seconds=0.15,
+                 max_utterance_seconds=15):
+        if microphone is None:
+            import speech_recognition as sr
+            microphone = sr.Microphone()
+        self.microphone = microphone
+        self.buffer_seconds = buffer_seconds
+        self.frame_ms = frame_ms
+        self.energy_threshold = energy_threshold
+        self.pause_seconds = pause_seconds
+        self.pre_roll_seconds = pre_roll_seconds
+        self.min_speech_seconds = min_speech_seconds
+        self.max_utterance_seconds = max_utterance_seconds
+        self.utterances = queue.Queue()
+        self.ring = None
+        self.segmenter = None
+        self.is_running = False
+        self._source = None
+        self._thread = None
+
+    def start(self):
+        """
+        Open the microphone and start the capture thread
+        """
+        if self.is_running:
+            return self
+
+        self._source = self.microphone.__enter__()
+        self.sample_rate = self._source.SAMPLE_RATE
+        self.sample_width = self._source.SAMPLE_WIDTH
+
+        frame_bytes = int(self.sample_rate * self.frame_ms / 1000) * self.sample_width
+        frames_per_second = 1000 / self.frame_ms
+        capacity = int(self.buffer_seconds * frames_per_second) * frame_bytes
+
+        self.ring = AudioRingBuffer(capacity)
+        self.segmenter = EnergySegmenter(
+            frame_bytes, self.sample_width,
+            energy_threshold=self.energy_threshold,
+            pause_frames=max(1, int(self.pause_seconds * frames_per_second)),
+            pre_roll_frames=int(self.pre_roll_seconds * frames_per_second),
+            min_speech_frames=max(1, int(self.min_speech_seconds * frames_per_second)),
+            max_frames=int(self.max_utterance_seconds * frames_per_second),
+            seconds_per_frame=self.frame_ms / 1000)
+
+        self.is_running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the capture thread and release the microphone
+        """
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self.microphone.__exit__(None, None, None)
+        self._source = None
+
+    def _capture_loop(self):
+        """
+        Read microphone chunks into the ring and segment them frame by frame
+        """
+        frame_bytes = self.segmenter.frame_bytes
+        position = 0
+        while self.is_running:
+            try:
+                chunk = self._source.stream.read(self._source.CHUNK)
+            except Exception as e:
+                print(f"Error reading microphone stream: {e}")
+                break
+
+            self.ring.write(chunk)
+            while self.ring.written - position >= frame_bytes:
+                frame = self.ring.view(position, position + frame_bytes)
+                utterance = self.segmenter.process(position, frame)
+                position += frame_bytes
+                if utterance is not None:
+                    self.utterances.put(utterance)
+
+        self.is_running = False
+
+    def get_utterance(self, timeout=None):
+        """
+        Wait for the next segmented utterance as AudioData
+
+        Raises sr.WaitTimeoutError if nothing is spoken within the timeout.
+        Utterances that were overwritten before being collected are skipped.
+        """
+        while True:
+            try:
+                utterance = self.utterances.get(timeout=timeout)
+            except queue.Empty:
+                import speech_recognition as sr
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            if self.ring.is_available(*utterance):
+                return self.audio_data(utterance)
+            print("Dropped an utterance that was overwritten before recognition")
+
+    def audio_data(self, utterance):
+        """
+        Wrap an utterance's ring buffer slice as AudioData without copying
+        """
+        import speech_recognition as sr
+
+        return sr.AudioData(self.ring.view(*utterance), self.sample_rate, self.sample_width)
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+import wave
+from collections import namedtuple
+import speech_recognition as sr
+from recognizer_backends import ScriptedBackend
+
+# One recorded utterance: its WAV file, format and (if known) what was said
+Fixture = namedtuple("Fixture", ["path", "sample_rate", "sample_width", "transcript"])
+
+MANIFEST = "fixtures.jsonl"
+
+class FixtureRecorder:
+    """
+    Saves captured AudioData as mono WAV files plus a JSONL manifest.
+
+    Each line of the manifest records the file name, sample rate, sample
+    width and the transcript the recognizer returned (null if it failed), so
+    a session can be replayed later with ReplayMicrophone and FixtureBackend.
+    """
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+        self.count = len(load_fixtures(fixture_dir)) if os.path.exists(self.manifest) else 0
+        self._lock = threading.Lock()
+
+    @property
+    def manifest(self):
+        return os.path.join(self.fixture_dir, MANIFEST)
+
+    def save(self, audio, transcript=None):
+        """
+        Write one utterance and append it to the manifest; returns its Fixture
+        """
+        with self._lock:
+            name = f"utterance_{self.count:05d}.wav"
+            self.count += 1
+            path = os.path.join(self.fixture_dir, name)
+            with wave.open(path, 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(audio.sample_width)
+                f.setframerate(audio.sample_rate)
+                f.writeframes(bytes(audio.frame_data))
+            entry = {"file": name, "sample_rate": audio.sample_rate,
+                     "sample_width": audio.sample_width, "transcript": transcript}
+            with open(self.manifest, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        return Fixture(path, audio.sample_rate, audio.sample_width, transcript)
+
+def load_fixtures(fixture_dir):
+    """
+    Read the fixtures listed in a directory's manifest, in recording order
+    """
+    fixtures = []
+    with open(os.path.join(fixture_dir, MANIFEST), 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                fixtures.append(Fixture(os.path.join(fixture_dir, entry["file"]), entry["sample_rate"],
+                                        entry["sample_width"], entry.get("transcript")))
+    return fixtures
+
+def read_frames(fixture):
+    """
+    Raw PCM bytes of a fixture's WAV file
+    """
+    with wave.open(fixture.path, 'rb') as f:
+        return f.readframes(f.getnframes())
+
+class ReplayStream:
+    """
+    File-like PCM stream that plays fixtures back, separated by silence.
+
+    With speed=1.0 reads are paced like a live microphone; speed=4.0 plays
+    four times faster and speed=0 returns audio as fast as it is read.
+    After the last fixture the stream yields silence, so listen() times out
+    as it would in a quiet room. end_times records the wall-clock time at
+    which the last sample of each fixture was read.
+    """
+    def __init__(self, data, fixture_ends, sample_rate, sample_width, speed=1.0):
+        self.data = data
+        self.fixture_ends = fixture_ends
+        self.bytes_per_second = sample_rate * sample_width
+        self.sample_width = sample_width
+        self.speed = speed
+        self.position = 0
+        self.end_times = []
+        self._started = None
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.data)
+
+    def read(self, frames):
+        """
+        Return the next `frames` mono samples, like a PyAudio input stream
+        """
+        size = frames * self.sample_width
+        if self._started is None:
+            self._started = time.perf_counter()
+
+        data = self.data[self.position:self.position + size]
+        data += bytes(size - len(data))
+        self.position += size
+
+        if self.speed:
+            # Don't run ahead of the (scaled) wall clock
+            delay = self._started + self.position / self.bytes_per_second / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        now = time.perf_counter()
+        while (len(self.end_times) < len(self.fixture_ends)
+               and self.fixture_ends[len(self.end_times)] <= self.position):
+            self.end_times.append(now)
+        return data
+
+    def close(self):
+        pass
+
+class ReplayMicrophone(sr.AudioSource):
+    """
+    Drop-in substitute for sr.Microphone that plays recorded fixtures.
+
+    Audio goes through the real Recognizer.listen / adjust_for_ambient_noise
+    path (or a MicrophoneStream) exactly as live input would. The stream
+    position is kept across `with` blocks, so successive listen() calls get
+    successive utterances. All fixtures must share one sample format.
+    """
+    def __init__(self, fixtures, speed=1.0, lead_seconds=1.0, gap_seconds=1.5, chunk_size=1024):
+        if not fixtures:
+            raise ValueError("ReplayMicrophone needs at least one fixture")
+        formats = {(fixture.sample_rate, fixture.sample_width) for fixture in fixtures}
+        if len(formats) > 1:
+            raise ValueError(f"Fixtures use more than one sample format: {sorted(formats)}")
+        self.SAMPLE_RATE, self.SAMPLE_WIDTH = formats.pop()
+        self.CHUNK = chunk_size
+        self.device_index = "replay"
+        self.fixtures = fixtures
+
+        def silence(seconds):
+            return bytes(int(self.SAMPLE_RATE * seconds) * self.SAMPLE_WIDTH)
+
+        data = bytearray(silence(lead_seconds))
+        ends = []
+        for fixture in fixtures:
+            data += read_frames(fixture)
+            ends.append(len(data))
+            data += silence(gap_seconds)
+        self.stream = ReplayStream(bytes(data), ends, self.SAMPLE_RATE, self.SAMPLE_WIDTH, speed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+class FixtureBackend(ScriptedBackend):
+    """
+    Local recognizer stand-in for replayed fixtures.
+
+    Returns each fixture's recorded transcript in order, after a fixed
+    simulated recognition delay. Unlike ScriptedBackend it requires audio,
+    so the assistant really captures every utterance before "recognizing" it.
+    """
+    name = "fixtures"
+    requires_audio = True
+
+    def __init__(self, fixtures, delay=0.0, timeout=None):
+        super().__init__([fixture.transcript for fixture in fixtures], delay=delay, timeout=timeout)
@@ -0,0 +1,66 @@
+"""
+Cold-start benchmark for the assistant in each construction mode.
+
+Every sample runs in a fresh interpreter, so module imports are measured
+cold. Modes:
+
+    import    import v_assis only
+    headless  VoiceAssistant(headless=True), text only, no audio stack
+    lazy      VoiceAssistant(), audio stack deferred until first use
+    audio     VoiceAssistant() plus initializing the speech engine and recognizer
+
+Run from the repository root:
+
+    python benchmarks/bench_cold_start.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "import": "import v_assis",
+    "headless": "import v_assis; v_assis.VoiceAssistant('Vira', headless=True)",
+    "lazy": "import v_assis; v_assis.VoiceAssistant('Vira')",
+    "audio": "import v_assis; a = v_assis.VoiceAssistant('Vira'); a.engine; a.recognizer",
+}
+
+TEMPLATE = """
+import contextlib, io, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    {code}
+print(time.perf_counter() - start)
+"""
+
+def sample(code):
+    result = subprocess.run([sys.executable, "-c", TEMPLATE.format(root=ROOT, code=code)],
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    # Build the command index once so every mode measures a warm index load
+    sample(MODES["headless"])
+
+    for mode in args.modes:
+        try:
+            times = [sample(MODES[mode]) * 1000 for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{mode:<9} unavailable ({e})")
+            continue
+        print(f"{mode:<9} median {statistics.median(times):7.1f} ms   "
+              f"min {min(times):7.1f} ms   max {max(times):7.1f} ms")
+
+if __name__ == "__main__":
+    main()
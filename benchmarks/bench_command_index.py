@@ -0,0 +1,66 @@
+"""
+Benchmark cold compilation versus warm loading of the command index.
+
+Builds synthetic command definitions of increasing size in a temporary
+directory, then times a cold build (no index on disk) against a warm load
+(mmap of the existing index). Run from the repository root:
+
+    python benchmarks/bench_command_index.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_registry import CommandRegistry
+from bench_command_matcher import generate_table
+
+def write_definitions(path, size):
+    """
+    Write a definitions file with the real command set plus synthetic phrases
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, "command_definitions.json"), 'r', encoding='utf-8') as f:
+        definitions = json.load(f)
+
+    for phrase in generate_table(size):
+        definitions["rules"].append({"intent": "synthetic", "template": phrase, "response": phrase})
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(definitions, f)
+
+def main():
+    sizes = [0, 1000, 10000, 50000]
+    print(f"{'phrases':>8} {'cold ms':>9} {'warm ms':>9} {'index KB':>9} {'match us':>9}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        definitions_file = os.path.join(directory, "definitions.json")
+        index_file = os.path.join(directory, "index.bin")
+
+        for size in sizes:
+            write_definitions(definitions_file, size)
+            if os.path.exists(index_file):
+                os.remove(index_file)
+
+            start = time.perf_counter()
+            CommandRegistry(definitions_file, index_file).load()
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(5):
+                grammar = CommandRegistry(definitions_file, index_file).load()
+            warm_ms = (time.perf_counter() - start) * 1000 / 5
+
+            start = time.perf_counter()
+            for _ in range(1000):
+                grammar.match("hey can you tell me the current time please")
+            match_us = (time.perf_counter() - start) * 1000
+
+            index_kb = os.path.getsize(index_file) / 1024
+            print(f"{grammar.count():>8} {cold_ms:>9.1f} {warm_ms:>9.2f} {index_kb:>9.0f} {match_us:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark per-utterance matching latency as the command table grows.
+
+Compares the original linear substring scan over the command dict with the
+compiled CommandMatcher. Run from the repository root:
+
+    python benchmarks/bench_command_matcher.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_matcher import CommandMatcher
+
+WORDS = ["play", "music", "time", "date", "tell", "me", "a", "joke", "what", "is", "the",
+         "weather", "today", "set", "timer", "for", "open", "close", "lights", "kitchen",
+         "volume", "up", "down", "next", "song", "call", "mom", "remind", "send", "email"]
+
+UTTERANCES = [
+    "what time is it",
+    "hey could you please tell me a joke about cats",
+    "this is a sentence that matches nothing at all in the table",
+    "turn the kitchen lights down and then play some music",
+]
+
+def generate_table(size, seed=0):
+    """
+    Generate a table of distinct synthetic phrases
+    """
+    rng = random.Random(seed)
+    table = {}
+    while len(table) < size:
+        phrase = " ".join(rng.choice(WORDS) + str(rng.randrange(1000)) for _ in range(rng.randint(2, 4)))
+        table[phrase] = len(table)
+    for utterance in UTTERANCES[:2]:
+        table[utterance] = len(table)
+    return table
+
+def linear_scan(table, text):
+    """
+    The original dispatch loop: first substring hit in insertion order
+    """
+    for command, handler in table.items():
+        if command in text:
+            return handler
+    return None
+
+def time_per_call(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def main():
+    sizes = [300, 1000, 5000, 20000, 50000, 100000]
+    print(f"{'entries':>8} {'build ms':>9} {'linear us':>10} {'matcher us':>11}")
+
+    for size in sizes:
+        table = generate_table(size)
+
+        start = time.perf_counter()
+        matcher = CommandMatcher()
+        matcher.update(table)
+        matcher.compile()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        linear_us = sum(time_per_call(lambda t: linear_scan(table, t), u, 20) for u in UTTERANCES) / len(UTTERANCES)
+        matcher_us = sum(time_per_call(matcher.match, u, 2000) for u in UTTERANCES) / len(UTTERANCES)
+
+        print(f"{size:>8} {build_ms:>9.1f} {linear_us:>10.1f} {matcher_us:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Deterministic capture-to-speech latency benchmark using recorded fixtures.
+
+Replays a fixture directory (recorded with VoiceAssistant.record_fixtures)
+through ReplayMicrophone and the real Recognizer.listen path, with
+FixtureBackend standing in for the recognizer. Without --fixtures, a set of
+synthetic utterances (noise bursts labelled with transcripts) is generated.
+For every turn it reports where the time goes between the end of the
+utterance and the start of the reply:
+
+    capture    end of speech -> listen() returns (pause detection)
+    recognize  simulated recognition delay
+    dispatch   process_command
+    total      end of speech -> speak() starts
+
+Audio is replayed --speed times faster than real time, so capture times
+are wall-clock and shrink with the speed (multiply by it for real time).
+Run from the repository root:
+
+    python benchmarks/bench_end_to_end.py --speed 8 --recognition-delay 0.05
+    python benchmarks/bench_end_to_end.py --fixtures my_session --speed 1
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+from audio_fixtures import FixtureBackend, FixtureRecorder, ReplayMicrophone, load_fixtures
+from noise_calibration import NoiseCalibration
+from v_assis import VoiceAssistant
+
+TRANSCRIPTS = ["what time is it", "tell me a joke", "what's the date", "hello there",
+               "play some music", "what is your name", "thank you", "tell me a joe"]
+
+def synthesize_fixtures(fixture_dir, count, seed=0, sample_rate=16000):
+    """
+    Write "utterances" of noise-burst syllables (0.6-1.6 seconds) with scripted transcripts
+    """
+    rng = random.Random(seed)
+    recorder = FixtureRecorder(fixture_dir)
+    for i in range(count):
+        samples = array("h")
+        duration = rng.uniform(0.6, 1.6)
+        while len(samples) < duration * sample_rate:
+            # A loud syllable, then a short near-silent gap (well under the pause threshold)
+            for amplitude, seconds in ((5000, rng.uniform(0.12, 0.2)), (50, rng.uniform(0.1, 0.2))):
+                samples.extend(max(-32768, min(32767, int(rng.gauss(0, amplitude))))
+                               for _ in range(int(sample_rate * seconds)))
+        recorder.save(sr.AudioData(samples.tobytes(), sample_rate, 2), TRANSCRIPTS[i % len(TRANSCRIPTS)])
+    return load_fixtures(fixture_dir)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run(fixtures, speed, recognition_delay, workdir):
+    assistant = VoiceAssistant("Vira", recognizer_backend=FixtureBackend(fixtures, delay=recognition_delay),
+                               headless=True)
+    assistant.calibration = NoiseCalibration(os.path.join(workdir, "calibration.json"))
+    microphone = ReplayMicrophone(fixtures, speed=speed)
+    assistant.microphone = microphone
+
+    stages = {"capture": [], "recognize": [], "dispatch": [], "total": []}
+    understood = 0
+    for fixture in fixtures:
+        audio = assistant.capture()
+        captured = time.perf_counter()
+        text = assistant.recognize(audio)
+        recognized = time.perf_counter()
+        assistant.process_command(text)
+        replying = time.perf_counter()
+
+        speech_end = microphone.stream.end_times[len(stages["total"])]
+        stages["capture"].append(captured - speech_end)
+        stages["recognize"].append(recognized - captured)
+        stages["dispatch"].append(replying - recognized)
+        stages["total"].append(replying - speech_end)
+        understood += text == fixture.transcript
+    return stages, understood
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", help="fixture directory (default: synthesize --count utterances)")
+    parser.add_argument("--count", type=int, default=16)
+    parser.add_argument("--speed", type=float, default=8.0, help="replay speed; 1 = real time")
+    parser.add_argument("--recognition-delay", type=float, default=0.05, help="simulated recognizer delay (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.fixtures:
+            fixtures = load_fixtures(args.fixtures)
+        else:
+            fixtures = synthesize_fixtures(os.path.join(workdir, "fixtures"), args.count)
+
+        start = time.perf_counter()
+        stages, understood = run(fixtures, args.speed, args.recognition_delay, workdir)
+        elapsed = time.perf_counter() - start
+
+    print(f"\n{len(fixtures)} turns at {args.speed:g}x speed in {elapsed:.2f}s; "
+          f"{understood}/{len(fixtures)} utterances segmented and transcribed in order")
+    print(f"{'stage':<10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for stage, values in stages.items():
+        print(f"{stage:<10} {percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.95) * 1000:>8.1f} "
+              f"{max(values) * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Accuracy and latency of the fuzzy command index.
+
+1. Misrecognized transcripts against the shipped command definitions:
+   handler accuracy of the exact grammar plus the original keyword fallback
+   chain, versus the exact grammar plus the fuzzy index.
+2. Fuzzy lookup latency as a synthetic command table grows to tens of
+   thousands of phrases, with one or two corrupted words per query.
+
+Run from the repository root:
+
+    python benchmarks/bench_fuzzy_index.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_grammar import CommandGrammar
+from command_registry import CommandRegistry
+from fuzzy_index import FuzzyIndex
+from text_normalizer import normalize
+from v_assis import DEFINITIONS_FILE
+
+# (transcript as misrecognized, handler or intent that should answer; None = no command)
+MISHEARD = [
+    ("tell me a joe", "tell_joke"),
+    ("what's the thyme", "get_time"),
+    ("what's the tim", "get_time"),
+    ("tel me a jok", "tell_joke"),
+    ("hallo", "respond_hello"),
+    ("whats the date", "get_date"),
+    ("what is your nam", "name"),
+    # Stop is only reached by saying it exactly
+    ("shutdwn", None),
+    ("exited", None),
+    ("plai some music", "music"),
+    ("wether forecast", "weather"),
+    ("show comands", "provide_help"),
+    ("this is a sentence about nothing", None),
+    ("this thing is broken", None),
+    ("what a lovely birthday party", None),
+]
+
+def keyword_chain(text):
+    """
+    The original fallback: substring keyword checks in a fixed order
+    """
+    if any(word in text for word in ["hello", "hi", "hey", "greetings"]):
+        return "respond_hello"
+    if any(phrase in text for phrase in ["time", "hour", "clock"]):
+        return "get_time"
+    if any(phrase in text for phrase in ["date", "day", "today"]):
+        return "get_date"
+    if any(phrase in text for phrase in ["joke", "funny"]):
+        return "tell_joke"
+    return None
+
+def action_label(action):
+    return action.handler or action.intent
+
+def accuracy():
+    grammar = CommandRegistry(DEFINITIONS_FILE, None)._compile()
+    fuzzy = FuzzyIndex(grammar)
+    results = {"keyword chain": 0, "fuzzy index": 0}
+    for text, expected in MISHEARD:
+        canonical = normalize(text)
+        exact = grammar.match(canonical.text)
+        if exact:
+            chain = fuzzy_answer = action_label(exact.handler)
+        else:
+            chain = keyword_chain(text)
+            found = fuzzy.match(canonical.text, canonical.tokens)
+            fuzzy_answer = action_label(found.match.handler) if found else None
+        results["keyword chain"] += chain == expected
+        results["fuzzy index"] += fuzzy_answer == expected
+    for label, correct in results.items():
+        print(f"{label:<14} {correct}/{len(MISHEARD)} misrecognized transcripts answered correctly")
+
+def pseudo_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+def corrupt(word, rng):
+    i = rng.randrange(len(word))
+    kind = rng.choice(("substitute", "delete", "insert", "swap"))
+    if kind == "substitute":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    i = min(i, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def latency(size, queries=300, seed=0):
+    rng = random.Random(seed)
+    vocabulary = list({pseudo_word(rng) for _ in range(max(200, size // 4))})
+    phrases = list({" ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 4))) for _ in range(size)})
+
+    grammar = CommandGrammar()
+    for index, phrase in enumerate(phrases):
+        grammar.add_rule(phrase, index)
+    grammar.compile()
+
+    start = time.perf_counter()
+    fuzzy = FuzzyIndex(grammar).build()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    hits = 0
+    for _ in range(queries):
+        target = rng.randrange(len(phrases))
+        words = phrases[target].split()
+        for index in rng.sample(range(len(words)), rng.randint(1, min(2, len(words)))):
+            if len(words[index]) >= 5:
+                words[index] = corrupt(words[index], rng)
+        text = " ".join(words)
+        start = time.perf_counter()
+        found = fuzzy.match(text) if grammar.match(text) is None else True
+        timings.append(time.perf_counter() - start)
+        hits += found is not None
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    print(f"{size:>8} {len(vocabulary):>7} {build_ms:>9.0f} {p50:>8.0f} {p99:>8.0f} {hits / queries:>8.0%}")
+
+def main():
+    accuracy()
+    print(f"\n{'phrases':>8} {'words':>7} {'build ms':>9} {'p50 us':>8} {'p99 us':>8} {'found':>8}")
+    for size in (1000, 10000, 50000):
+        latency(size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Tail-latency benchmark for hedged recognition.
+
+Two scripted backends answer with a seeded heavy-tailed delay distribution
+(mostly fast, occasionally very slow). The same request sequence is run
+against the primary alone and through HedgedBackend, and the p50/p95/p99
+latencies and the extra request load are compared. Run from the repository
+root:
+
+    python benchmarks/bench_hedging.py --requests 400
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hedged_recognition import HedgedBackend
+from recognizer_backends import ScriptedBackend
+
+def heavy_tail_script(rng, count, fast=0.02, slow=0.4, slow_fraction=0.08):
+    script = []
+    for _ in range(count):
+        delay = fast * (0.5 + rng.random())
+        if rng.random() < slow_fraction:
+            delay = slow * (0.5 + rng.random())
+        script.append({"text": "what time is it", "delay": delay})
+    return script
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(backend, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await backend.recognize_async(None)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def report(label, latencies, calls):
+    summary = " ".join(f"{name}={percentile(latencies, fraction) * 1000:7.1f}ms"
+                       for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)))
+    print(f"{label:<10} {summary}  backend calls={calls}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=0.15, help="max fraction of requests that may hedge")
+    args = parser.parse_args()
+
+    primary_script = heavy_tail_script(random.Random(args.seed), args.requests)
+    secondary_script = heavy_tail_script(random.Random(args.seed + 1), args.requests)
+
+    baseline = asyncio.run(run(ScriptedBackend(primary_script), args.requests))
+    report("primary", baseline, args.requests)
+
+    hedged = HedgedBackend([ScriptedBackend(primary_script, repeat=True),
+                            ScriptedBackend(secondary_script, repeat=True)],
+                           min_samples=10, hedge_budget=args.budget)
+    latencies = asyncio.run(run(hedged, args.requests))
+    report("hedged", latencies, args.requests + hedged.stats["hedges"] + hedged.stats["failovers"])
+    print(f"hedge rate {hedged.stats['hedges'] / args.requests:.1%}, "
+          f"hedge wins {hedged.stats['hedge_wins']}, final hedge delay {hedged.hedge_delay(0) * 1000:.1f}ms "
+          f"(primary p95 {percentile(baseline, 0.95) * 1000:.1f}ms; losing attempts are censored samples)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput of the intent classifier, one utterance at a time versus batched.
+
+Trains on the shipped command definitions and on a synthetic grammar with
+many intents, then classifies a stream of utterances with classify() and
+with classify_batch(). Utterances are drawn from a Zipf-like distribution
+over a pool of distinct transcripts, since real transcripts repeat a lot. Run from the repository root:
+
+    python benchmarks/bench_intent_classifier.py --utterances 5000
+
+With --sweep it instead replays transcripts.jsonl, which the threshold was
+tuned on, and heldout_transcripts.jsonl, which it was not, through the whole
+dispatcher at a range of confidence thresholds and prints the accuracy of each:
+
+    python benchmarks/bench_intent_classifier.py --sweep
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_grammar import CommandGrammar
+from command_registry import CommandAction, CommandRegistry
+from intent_classifier import IntentClassifier
+from replay import load_transcripts, replay
+from v_assis import DEFINITIONS_FILE, VoiceAssistant
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+TUNING_FILE = os.path.join(BENCHMARKS_DIR, "transcripts.jsonl")
+HELDOUT_FILE = os.path.join(BENCHMARKS_DIR, "heldout_transcripts.jsonl")
+
+FILLERS = ["please", "could you", "hey", "now", "for me", "quickly", "i want to", "um", "can you", "right now"]
+
+def synthetic_grammar(intents, rng):
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 8)))
+             for _ in range(intents * 4)]
+    grammar = CommandGrammar()
+    for intent in range(intents):
+        action = CommandAction(f"intent{intent}", None, f"response {intent}")
+        for _ in range(5):
+            grammar.add_rule(" ".join(rng.sample(words, 3)), action)
+    return grammar
+
+def utterances(grammar, count, rng):
+    phrases = list(grammar.expand())
+    texts = set()
+    while len(texts) < count:
+        words = rng.choice(phrases).split()
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+        texts.add(" ".join(words) + f" {rng.randrange(10000)}")
+    return list(texts)
+
+def run(label, grammar, count, rng):
+    start = time.perf_counter()
+    classifier = IntentClassifier(grammar).build()
+    build_ms = (time.perf_counter() - start) * 1000
+    pool = utterances(grammar, max(1, count // 5), rng)
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    texts = rng.choices(pool, weights, k=count)
+
+    start = time.perf_counter()
+    single = [classifier.classify(text) for text in texts]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classifier.classify_batch(texts)
+    batch_s = time.perf_counter() - start
+
+    assert [m and m.action for m in single] == [m and m.action for m in batch]
+    answered = sum(m is not None for m in batch) / len(texts)
+    print(f"{label:<22} {len(classifier.actions):>7} {build_ms:>9.1f} {count / single_s:>11.0f} "
+          f"{count / batch_s:>10.0f} {answered:>9.0%}")
+
+def sweep(thresholds):
+    """
+    Dispatcher accuracy on the tuning and held-out transcripts at each threshold
+    """
+    assistant = VoiceAssistant("Vira", headless=True)
+    tuning = load_transcripts(TUNING_FILE)
+    heldout = load_transcripts(HELDOUT_FILE)
+    default = assistant.intent_classifier.threshold
+    print(f"{'threshold':>9} {'tuning':>8} {'held-out':>9}")
+    for threshold in thresholds:
+        assistant.intent_classifier.threshold = threshold
+        marker = "  (default)" if abs(threshold - default) < 1e-9 else ""
+        print(f"{threshold:>9.2f} {replay(assistant, tuning)['accuracy']:>8.1%} "
+              f"{replay(assistant, heldout)['accuracy']:>9.1%}{marker}")
+    assistant.intent_classifier.threshold = default
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--utterances", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sweep", action="store_true", help="report accuracy across confidence thresholds")
+    args = parser.parse_args()
+    if args.sweep:
+        sweep([round(0.20 + 0.01 * step, 2) for step in range(21)])
+        return
+    rng = random.Random(args.seed)
+
+    print(f"{'grammar':<22} {'classes':>7} {'build ms':>9} {'single /s':>11} {'batch /s':>10} {'answered':>9}")
+    run("command definitions", CommandRegistry(DEFINITIONS_FILE, None)._compile(), args.utterances, rng)
+    for intents in (100, 1000):
+        run(f"synthetic {intents} intents", synthetic_grammar(intents, rng), args.utterances, rng)
+
+if __name__ == "__main__":
+    main()
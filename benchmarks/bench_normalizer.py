@@ -0,0 +1,83 @@
+"""
+Per-utterance cost of the text normalizer, and what it buys.
+
+Every transcript in transcripts.jsonl is also rendered the way other
+recognizers and speakers produce it: capitalized and punctuated, with
+contractions spelled out or contracted, and with hesitation fillers. The
+benchmark reports the time normalize() takes per utterance next to the
+time of a whole resolve_command(). It also reports how many variants the
+exact grammar matches directly, first on the lower-cased text and then
+on the normalized text. Run from the repository root:
+
+    python benchmarks/bench_normalizer.py --repeat 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import normalize
+from v_assis import VoiceAssistant
+
+TRANSCRIPTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcripts.jsonl")
+
+# Spelled-out <-> contracted forms
+SWAPS = [("what is", "what's"), ("what's", "what is"), ("it is", "it's"), ("do not", "don't"),
+         ("you are", "you're"), ("i am", "i'm")]
+FILLERS = ["um", "uh", "hmm"]
+
+def variants(text, rng):
+    """
+    The same command as a different recognizer or speaker might deliver it
+    """
+    swapped = text
+    for a, b in SWAPS:
+        if f" {a} " in f" {swapped} ":
+            swapped = f" {swapped} ".replace(f" {a} ", f" {b} ").strip()
+            break
+    words = text.split()
+    words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+    return [text[0].upper() + text[1:] + "?", swapped, " ".join(words) + ".", f"Um, {swapped}!"]
+
+def per_call(function, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            function(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared text normalizer.")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(TRANSCRIPTS_FILE, 'r', encoding='utf-8') as f:
+        transcripts = [json.loads(line)["text"] for line in f if line.strip()]
+    transcripts = [text for text in transcripts if text]
+    rng = random.Random(args.seed)
+    texts = [variant for text in transcripts for variant in variants(text, rng)]
+
+    assistant = VoiceAssistant("Vira", headless=True)
+    grammar = assistant.grammar
+    # Greetings and jokes pick replies at random
+    random.seed(args.seed)
+
+    normalizing = per_call(normalize, texts, args.repeat)
+    lowering = per_call(lambda text: " ".join(text.lower().split()), texts, args.repeat)
+    resolving = per_call(assistant.resolve_command, texts, max(1, args.repeat // 20))
+    print(f"{len(texts)} utterances ({len(transcripts)} transcripts x 4 renderings)")
+    print(f"normalize        {normalizing * 1e6:7.2f} us/utterance")
+    print(f"lower + split    {lowering * 1e6:7.2f} us/utterance")
+    print(f"resolve_command  {resolving * 1e6:7.2f} us/utterance (normalizing is {normalizing / resolving:.1%})")
+
+    raw = sum(grammar.match(" ".join(text.lower().split())) is not None for text in texts)
+    canonical = sum(grammar.match(normalize(text).text) is not None for text in texts)
+    print(f"exact grammar matches: lower-cased {raw}/{len(texts)}, normalized {canonical}/{len(texts)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Time from the start of recognition to a ready reply, with and without early dispatch.
+
+A ScriptedStreamingBackend emits each transcript word by word (--word-delay
+apart) and the final result --final-delay later, like a streaming recognizer
+waiting for end of speech. With early dispatch the assistant acts on the
+first partial that is already an unambiguous command. Run from the
+repository root:
+
+    python benchmarks/bench_streaming.py --word-delay 0.05 --final-delay 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recognizer_backends import ScriptedStreamingBackend
+from v_assis import VoiceAssistant
+
+TRANSCRIPTS = ["what time is it", "tell me a joke", "what's the date", "hello there", "hello",
+               "play some music", "what is your name", "thank you", "what time is it now",
+               "can you tell me the current time", "help", "calculate 2 plus 2"]
+
+def run(early_dispatch, word_delay, final_delay):
+    backend = ScriptedStreamingBackend(TRANSCRIPTS, word_delay=word_delay, delay=final_delay)
+    assistant = VoiceAssistant("Vira", recognizer_backend=backend, headless=True)
+    assistant.early_dispatch = early_dispatch
+    assistant.process_command("warm up")
+    # Greetings and jokes are picked at random; replay the same choices in both runs
+    random.seed(0)
+
+    latencies = []
+    responses = []
+    for _ in TRANSCRIPTS:
+        start = time.perf_counter()
+        text = assistant.recognize(None)
+        responses.append(assistant.process_command(text))
+        latencies.append(time.perf_counter() - start)
+    return latencies, responses, assistant.streaming_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark early dispatch on streaming partials.")
+    parser.add_argument("--word-delay", type=float, default=0.05)
+    parser.add_argument("--final-delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    waiting, expected, _ = run(False, args.word_delay, args.final_delay)
+    early, responses, stats = run(True, args.word_delay, args.final_delay)
+
+    print(f"{'transcript':<36} {'final':>9} {'early':>9}")
+    for text, slow, fast in zip(TRANSCRIPTS, waiting, early):
+        print(f"{text:<36} {slow * 1000:>7.0f}ms {fast * 1000:>7.0f}ms")
+    print(f"mean: {sum(waiting) / len(waiting) * 1000:.0f} ms -> {sum(early) / len(early) * 1000:.0f} ms, "
+          f"committed early {stats['early']}/{len(TRANSCRIPTS)}")
+    # Time-of-day replies can differ between runs; everything else must match
+    differing = [text for text, a, b in zip(TRANSCRIPTS, expected, responses)
+                 if a != b and "time" not in a.lower()]
+    print("replies identical to waiting for the final result" if not differing
+          else f"replies differ for: {differing}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Wake word gate accuracy and cost on synthetic audio.
+
+The "wake phrase" is a fixed rhythm of tonal and hissy syllables, spoken
+with random tempo, loudness and pitch jitter. Chatter is random syllables.
+A few jittered phrases are enrolled as templates. The benchmark then
+reports how often the gate opens for the phrase alone, for the phrase
+followed by a command, and (falsely) for chatter, plus the time per check.
+Every rejected utterance is one recognizer request saved. Run from the
+repository root:
+
+    python benchmarks/bench_wake_word.py --chatter 200
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+from wake_word import WakeWordDetector
+
+SAMPLE_RATE = 16000
+# (seconds, pitch in Hz, or None for a hissy syllable) for each syllable of the wake phrase
+WAKE_PHRASE = [(0.16, 220), (0.10, None), (0.22, 330), (0.18, 180)]
+
+def syllable(samples, rng, seconds, pitch, amplitude):
+    count = int(SAMPLE_RATE * seconds)
+    for i in range(count):
+        # Short fade in and out so syllables do not click
+        envelope = min(1.0, i / 160, (count - i) / 160)
+        if pitch is None:
+            value = rng.gauss(0, amplitude * 0.6)
+        else:
+            value = amplitude * math.sin(2 * math.pi * pitch * i / SAMPLE_RATE) + rng.gauss(0, amplitude * 0.05)
+        samples.append(max(-32768, min(32767, int(envelope * value))))
+
+def gap(samples, rng, seconds):
+    samples.extend(int(rng.gauss(0, 30)) for _ in range(int(SAMPLE_RATE * seconds)))
+
+def utterance(rng, syllables, tempo_jitter=0.15):
+    """
+    Render (seconds, pitch) syllables with random tempo, loudness and pitch variation
+    """
+    samples = array("h")
+    gap(samples, rng, rng.uniform(0.05, 0.2))
+    amplitude = rng.uniform(2000, 9000)
+    tempo = rng.uniform(1 - tempo_jitter, 1 + tempo_jitter)
+    pitch_shift = rng.uniform(0.9, 1.1)
+    for seconds, pitch in syllables:
+        syllable(samples, rng, seconds * tempo, pitch and pitch * pitch_shift, amplitude * rng.uniform(0.8, 1.2))
+        gap(samples, rng, rng.uniform(0.02, 0.06))
+    gap(samples, rng, rng.uniform(0.05, 0.2))
+    return samples
+
+def random_syllables(rng, count):
+    return [(rng.uniform(0.08, 0.25), rng.choice([None, rng.uniform(120, 600)])) for _ in range(count)]
+
+def audio(samples):
+    return sr.AudioData(samples.tobytes(), SAMPLE_RATE, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the wake word gate on synthetic audio.")
+    parser.add_argument("--templates", type=int, default=3, help="enrolled wake phrase samples")
+    parser.add_argument("--wake", type=int, default=50, help="wake phrases alone / with a command")
+    parser.add_argument("--chatter", type=int, default=200, help="utterances without the wake phrase")
+    parser.add_argument("--threshold", type=float, default=None, help="override the detector threshold")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    detector = WakeWordDetector()
+    if args.threshold is not None:
+        detector.threshold = args.threshold
+    for _ in range(args.templates):
+        detector.enroll(audio(utterance(rng, WAKE_PHRASE)))
+
+    cases = {
+        "wake phrase": [audio(utterance(rng, WAKE_PHRASE)) for _ in range(args.wake)],
+        "wake + command": [audio(utterance(rng, WAKE_PHRASE + [(0.3, None)] + random_syllables(rng, 6)))
+                           for _ in range(args.wake)],
+        "chatter": [audio(utterance(rng, random_syllables(rng, rng.randint(2, 10))))
+                    for _ in range(args.chatter)],
+    }
+
+    print(f"threshold {detector.threshold}, {args.templates} templates")
+    timings = []
+    for name, clips in cases.items():
+        opened = with_command = 0
+        for clip in clips:
+            start = time.perf_counter()
+            detection = detector.detect(clip)
+            timings.append(time.perf_counter() - start)
+            if detection is not None:
+                opened += 1
+                with_command += detection.command_audio is not None
+        print(f"{name:>15}: gate opened {opened}/{len(clips)} ({opened / len(clips):.0%}), "
+              f"command split off {with_command}")
+
+    timings.sort()
+    print(f"detect: mean {sum(timings) / len(timings) * 1000:.2f} ms, "
+          f"p95 {timings[int(0.95 * len(timings))] * 1000:.2f} ms")
+    print(f"Recognizer requests avoided: {detector.stats['rejected']} of {detector.stats['checked']}")
+
+if __name__ == "__main__":
+    main()
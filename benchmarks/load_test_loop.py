@@ -0,0 +1,67 @@
+"""
+Offline load test of the assistant's listen -> recognize -> dispatch loop.
+
+Drives VoiceAssistant with a ScriptedBackend, so no microphone or network is
+needed. Recognition delays are drawn from a seeded distribution to mimic a
+remote recognizer. The assistant runs headless, so the audio stack is never
+loaded and speech output is not included.
+Run from the repository root:
+
+    python benchmarks/load_test_loop.py --turns 500 --delay 0.005 --jitter 0.01
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recognizer_backends import ScriptedBackend
+from v_assis import VoiceAssistant
+
+TRANSCRIPTS = [
+    "what time is it",
+    "hey there",
+    "can you tell me today's date",
+    "tell me a joke",
+    "play some music",
+    "what's the weather",
+    "thank you",
+    "this phrase matches nothing",
+]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0, help="base recognition delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="max extra random delay (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    script = [{"text": TRANSCRIPTS[i % len(TRANSCRIPTS)], "delay": args.delay + rng.random() * args.jitter}
+              for i in range(args.turns)]
+
+    assistant = VoiceAssistant("Vira", recognizer_backend=ScriptedBackend(script), headless=True)
+    assistant.is_active = True
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(args.turns):
+        turn_start = time.perf_counter()
+        command = assistant.listen()
+        assistant.process_command(command)
+        latencies.append(time.perf_counter() - turn_start)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{args.turns} turns in {elapsed:.2f}s ({args.turns / elapsed:.1f} turns/s)")
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{label}: {percentile(latencies, fraction) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
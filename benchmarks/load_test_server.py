@@ -0,0 +1,166 @@
+"""
+Concurrent-session load test of assistant_server.
+
+Starts the server in-process on a free port. Hundreds of simulated clients
+each open a session, over HTTP keep-alive or a WebSocket (half and half),
+send a series of commands and finish with "exit". The test reports
+throughput and latency percentiles. It also checks that the sessions are
+isolated: every session must stay active until its own "exit", and
+replies must match what a single local assistant gives. Run from the
+repository root:
+
+    python benchmarks/load_test_server.py --sessions 500 --commands 20 --workers 8
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistant_server import AssistantServer
+
+TRANSCRIPTS = ["what time is it", "hey there", "can you tell me today's date", "tell me a joke",
+               "play some music", "what's the weather", "thank you", "what is your name",
+               "this phrase matches nothing", "tell me a joe", "help"]
+
+# Replies that are the same for every session (greetings, jokes and times vary)
+STABLE = {"play some music", "what's the weather", "thank you", "what is your name",
+          "this phrase matches nothing", "help"}
+
+class HttpClient:
+    """
+    Minimal keep-alive HTTP/1.1 JSON client
+    """
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        return self
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def session(self, host, port):
+        await self.connect(host, port)
+        status, reply = await self.request("POST", "/sessions")
+        self.session_id = reply["session"]
+
+    async def command(self, text):
+        status, reply = await self.request("POST", f"/sessions/{self.session_id}/command", {"text": text})
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}: {reply}")
+        return reply
+
+    def close(self):
+        self.writer.close()
+
+class WebSocketClient:
+    """
+    Minimal WebSocket client sending masked text frames
+    """
+    async def session(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write(f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        await self.reader.readuntil(b"\r\n\r\n")
+        self.session_id = json.loads(await self._read())["session"]
+
+    async def _read(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+        return await self.reader.readexactly(length)
+
+    async def command(self, text):
+        payload = text.encode()
+        mask = os.urandom(4)
+        header = struct.pack("!BB", 0x81, 0x80 | len(payload)) if len(payload) < 126 else \
+            struct.pack("!BBH", 0x81, 0x80 | 126, len(payload))
+        self.writer.write(header + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload)))
+        return json.loads(await self._read())
+
+    def close(self):
+        self.writer.close()
+
+async def client(index, host, port, commands, rng, latencies, failures, expected):
+    connection = HttpClient() if index % 2 == 0 else WebSocketClient()
+    try:
+        await connection.session(host, port)
+        for _ in range(commands):
+            text = rng.choice(TRANSCRIPTS)
+            start = time.perf_counter()
+            reply = await connection.command(text)
+            latencies.append(time.perf_counter() - start)
+            if not reply["active"]:
+                failures.append(f"session {index} stopped by another session's command")
+            if text in expected and reply["response"] != expected[text]:
+                failures.append(f"session {index}: unexpected reply to {text!r}")
+        reply = await connection.command("exit")
+        if reply["active"]:
+            failures.append(f"session {index} still active after exit")
+    except Exception as e:
+        failures.append(f"session {index}: {type(e).__name__}: {e}")
+    finally:
+        if hasattr(connection, "writer"):
+            connection.close()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(args):
+    server = AssistantServer(port=0, max_workers=args.workers, max_pending=args.max_pending)
+    expected = {text: server.assistant.process_command(text) for text in STABLE}
+    await server.start()
+
+    rng = random.Random(args.seed)
+    latencies = []
+    failures = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(index, server.host, server.port, args.commands,
+                                  random.Random(rng.random()), latencies, failures, expected)
+                           for index in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+
+    total = len(latencies) + args.sessions
+    print(f"{args.sessions} concurrent sessions, {total} commands in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} commands/s, {args.workers} workers)")
+    if latencies:
+        print(f"latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"server stats: {server.stats}, sessions left open: {len(server.sessions)}")
+    if failures:
+        print(f"{len(failures)} failures, e.g.:")
+        for failure in failures[:5]:
+            print(f"  {failure}")
+        return 1
+    print("All sessions isolated and answered correctly")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the assistant server with concurrent sessions.")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--commands", type=int, default=20, help="commands per session before 'exit'")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
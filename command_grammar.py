@@ -0,0 +1,370 @@
+import itertools
+from collections import namedtuple
+from command_matcher import CommandMatcher
+from text_normalizer import normalize, normalize_phrase
+
+# A compiled rule: each element is a frozenset of fragment ids; capture names its trailing {*slot}
+GrammarRule = namedtuple("GrammarRule", ["template", "elements", "handler", "priority", "capture"],
+                         defaults=(None,))
+
+# A full rule match found in a transcript, with the text its capture slot took (if any)
+GrammarMatch = namedtuple("GrammarMatch", ["start", "end", "template", "handler", "priority", "capture"],
+                          defaults=(None,))
+
+class CommandGrammar:
+    """
+    Declarative slot grammar for command phrases.
+
+    A rule such as "{ask_prefix} {time_suffix}" is stored once instead of as
+    every prefix/suffix combination. All distinct fragments (slot alternatives
+    and literal words) share one Aho-Corasick automaton, and rules are matched
+    by chaining adjacent fragment hits, so memory and match cost grow with the
+    sum of the slot sizes rather than their product.
+
+    A template may end in a capture slot, "{*name}", which takes the rest of
+    the transcript ("calculate {*expression}"). A validator registered with
+    add_capture() decides whether the captured text is acceptable, so a
+    broad prefix such as "what is" only matches when an expression follows.
+    Rules whose capture slot was never registered do not match.
+
+    Slot alternatives and templates are stored in canonical form (see
+    text_normalizer), and match() expects normalized text.
+    """
+    def __init__(self):
+        self.slots = {}         # slot name -> list of alternatives
+        self.rules = []         # GrammarRule in registration order
+        self.templates = []     # raw (template, handler, priority) as registered
+        self.matcher = None     # fragment automaton, built by compile()
+        self.fragments = {}     # fragment phrase -> pattern id in the matcher
+        self.validators = {}    # capture slot name -> callable accepting the captured text
+        self.partial_validators = {}    # capture slot name -> callable accepting text that may grow valid
+        self._prefixes = None   # proper word prefix -> fragment ids, built by can_extend()
+        self._count = None
+        self._compiled = False
+
+    def add_slot(self, name, alternatives):
+        """
+        Define (or redefine) a named slot and its alternative phrases
+        """
+        # Alternatives that normalize alike ("what's", "what is") are kept once
+        self.slots[name] = list(dict.fromkeys(normalize_phrase(alt) for alt in alternatives))
+        self._count = None
+        self._compiled = False
+
+    def add_capture(self, name, validator=None, partial_validator=None):
+        """
+        Register a capture slot; without a validator any non-empty text is accepted
+
+        partial_validator tells can_extend() whether more words could still make
+        the captured text acceptable; without one, any text might.
+        """
+        self.validators[name] = validator
+        self.partial_validators[name] = partial_validator
+
+    def add_rule(self, template, handler, priority=0):
+        """
+        Map a template of literal words and {slot} references to a handler
+        """
+        self.templates.append((normalize_phrase(template), handler, priority))
+        self._count = None
+        self._compiled = False
+
+    def update(self, commands, priority=0):
+        """
+        Add every phrase of a {phrase: handler} table as a literal rule
+        """
+        for phrase, handler in commands.items():
+            self.add_rule(phrase, handler, priority)
+
+    @staticmethod
+    def capture_name(template):
+        """
+        Name of the template's trailing {*slot}, or None
+        """
+        last = template.rsplit(" ", 1)[-1]
+        return last[2:-1] if last.startswith("{*") and last.endswith("}") else None
+
+    def _parse(self, template):
+        """
+        Split a template into elements, each a list of alternative fragments
+
+        A trailing capture slot is not an element; see capture_name().
+        """
+        elements = []
+        literal = []
+        words = template.split()
+        if self.capture_name(template):
+            words = words[:-1]
+            if not words:
+                raise ValueError(f"Rule '{template}' needs words before its capture slot")
+        for word in words:
+            if word.startswith("{*"):
+                raise ValueError(f"Capture slot must end the rule '{template}'")
+            if word.startswith("{") and word.endswith("}"):
+                if literal:
+                    elements.append([" ".join(literal)])
+                    literal = []
+                name = word[1:-1]
+                if name not in self.slots:
+                    raise KeyError(f"Unknown slot '{name}' in rule '{template}'")
+                elements.append(self.slots[name])
+            else:
+                literal.append(word)
+        if literal:
+            elements.append([" ".join(literal)])
+        return elements
+
+    def compile(self):
+        """
+        Build the shared fragment automaton and the first-fragment rule index
+        """
+        if self._compiled:
+            return self
+
+        matcher = CommandMatcher()
+        fragments = {}
+        for template, _, _ in self.templates:
+            for alternatives in self._parse(template):
+                for fragment in alternatives:
+                    if fragment not in fragments:
+                        fragments[fragment] = len(fragments)
+                        matcher.add(fragment, fragments[fragment])
+
+        self._link(fragments, matcher.compile())
+        return self
+
+    @classmethod
+    def from_compiled(cls, slots, templates, matcher, rules, first, count=None):
+        """
+        Wrap already compiled tables without relinking them.
+
+        matcher is any object with find_all() whose match handlers are fragment
+        ids (for example a PackedMatcher loaded from disk), rules is indexable by
+        rule id and first maps a fragment id to the ids of rules starting with it.
+        """
+        grammar = cls()
+        grammar.slots = dict(slots)
+        grammar.templates = templates
+        grammar.matcher = matcher
+        grammar.rules = rules
+        grammar._first = first
+        grammar._count = count
+        grammar._compiled = True
+        return grammar
+
+    def _link(self, fragments, matcher):
+        """
+        Index every rule against the fragment ids of a compiled matcher
+        """
+        self.matcher = matcher
+        self.fragments = fragments
+        self.rules = []
+        self._first = {}
+        self._prefixes = None
+
+        for template, handler, priority in self.templates:
+            elements = tuple(frozenset(fragments[fragment] for fragment in alternatives)
+                             for alternatives in self._parse(template))
+            rule_id = len(self.rules)
+            self.rules.append(GrammarRule(template, elements, handler, priority, self.capture_name(template)))
+            for fragment_id in elements[0]:
+                self._first.setdefault(fragment_id, []).append(rule_id)
+
+        self._compiled = True
+
+    def find_all(self, text):
+        """
+        Return every complete rule match in the text
+        """
+        if not self._compiled:
+            self.compile()
+
+        # Fragment hits indexed by start position
+        hits = self.matcher.find_all(text)
+        starts = {}
+        for hit in hits:
+            starts.setdefault(hit.start, []).append((hit.handler, hit.end))
+
+        matches = []
+        for hit in hits:
+            for rule_id in self._first.get(hit.handler, ()):
+                rule = self.rules[rule_id]
+                self._extend(text, rule, 1, hit.start, hit.end, starts, matches)
+        return matches
+
+    def _extend(self, text, rule, position, start, end, starts, matches):
+        """
+        Follow adjacent fragment hits through the remaining rule elements
+        """
+        if position == len(rule.elements):
+            capture = None
+            if rule.capture:
+                capture = text[end:].strip()
+                if not capture or not text[end].isspace() or rule.capture not in self.validators:
+                    return
+                validator = self.validators[rule.capture]
+                if validator is not None and not validator(capture):
+                    return
+                end = len(text.rstrip())
+            matches.append(GrammarMatch(start, end, rule.template, rule.handler, rule.priority, capture))
+            return
+
+        next_start = end
+        while next_start < len(text) and text[next_start].isspace():
+            next_start += 1
+        if next_start == end:
+            return
+
+        for fragment_id, fragment_end in starts.get(next_start, ()):
+            if fragment_id in rule.elements[position]:
+                self._extend(text, rule, position + 1, start, fragment_end, starts, matches)
+
+    def match(self, text):
+        """
+        Return the best match: longest span first, then highest priority, then earliest
+        """
+        best = None
+        best_key = None
+        for found in self.find_all(text):
+            key = (found.end - found.start, found.priority, -found.start)
+            if best is None or key > best_key:
+                best, best_key = found, key
+        return best
+
+    def _fragment_id(self, fragment):
+        """
+        Pattern id of a fragment, also for grammars loaded without the fragment table
+        """
+        if fragment in self.fragments:
+            return self.fragments[fragment]
+        for hit in self.matcher.find_all(fragment):
+            if hit.start == 0 and hit.end == len(fragment):
+                return hit.handler
+        return None
+
+    def _prefix_index(self):
+        """
+        Map every proper word prefix of a multi-word fragment to the fragments it starts
+        """
+        if self._prefixes is None:
+            prefixes = {}
+            seen = set()
+            for template, _, _ in self.templates:
+                for alternatives in self._parse(template):
+                    for fragment in alternatives:
+                        words = fragment.split()
+                        if len(words) < 2 or fragment in seen:
+                            continue
+                        seen.add(fragment)
+                        fragment_id = self._fragment_id(fragment)
+                        for size in range(1, len(words)):
+                            prefixes.setdefault(" ".join(words[:size]), set()).add(fragment_id)
+            self._prefixes = prefixes
+        return self._prefixes
+
+    def can_extend(self, text, start=None):
+        """
+        True if more words after the text could still complete a rule match running past its end
+
+        The text is taken to end on a word boundary, as the partial hypotheses
+        of streaming recognizers do. With `start`, only matches beginning at or
+        before that position count.
+        """
+        if not self._compiled:
+            self.compile()
+        text = normalize(text).text
+        prefixes = self._prefix_index()
+
+        # Fragments that may be half spoken at the end of the text, by start position
+        limit = len(text) if start is None else start
+        pending = {}
+        for position in [0] + [i + 1 for i, ch in enumerate(text) if ch == " "]:
+            fragment_ids = prefixes.get(text[position:])
+            if fragment_ids:
+                pending[position] = fragment_ids
+                if position <= limit and any(self._first.get(fragment_id) for fragment_id in fragment_ids):
+                    return True
+
+        hits = self.matcher.find_all(text)
+        starts = {}
+        for hit in hits:
+            starts.setdefault(hit.start, []).append((hit.handler, hit.end))
+        for hit in hits:
+            if hit.start > limit:
+                continue
+            for rule_id in self._first.get(hit.handler, ()):
+                if self._continues(text, self.rules[rule_id], 1, hit.end, starts, pending):
+                    return True
+        return False
+
+    def _continues(self, text, rule, position, end, starts, pending):
+        """
+        True if the rest of a rule could follow a partial match of it that ends at `end`
+        """
+        if position == len(rule.elements):
+            # A registered capture slot takes more words, unless what it holds can never become valid
+            if rule.capture not in self.validators:
+                return False
+            partial_validator = self.partial_validators.get(rule.capture)
+            captured = text[end:].strip()
+            return not captured or partial_validator is None or partial_validator(captured)
+        if end == len(text):
+            return True
+        next_start = end + 1
+        if rule.elements[position] & pending.get(next_start, frozenset()):
+            return True
+        return any(self._continues(text, rule, position + 1, fragment_end, starts, pending)
+                   for fragment_id, fragment_end in starts.get(next_start, ())
+                   if fragment_id in rule.elements[position])
+
+    def match_partial(self, text):
+        """
+        Best match for a partial transcript once it is final, else None
+
+        A match is final when it ends the text and no longer command starting
+        no later than it could still be completed, so "what time is it" is
+        final but "what time" and "hello" ("hello there") are not.
+        """
+        text = normalize(text).text
+        found = self.match(text)
+        if found is None or found.end != len(text) or self.can_extend(text, found.start):
+            return None
+        return found
+
+    def count(self):
+        """
+        Number of phrase combinations across all rules, without expanding them
+        """
+        if self._count is None:
+            total = 0
+            for template, _, _ in self.templates:
+                size = 1
+                for alternatives in self._parse(template):
+                    size *= len(alternatives)
+                total += size
+            self._count = total
+        return self._count
+
+    def vocabulary(self):
+        """
+        Every distinct word used by the slots and rule templates
+        """
+        words = set()
+        for alternatives in self.slots.values():
+            for alternative in alternatives:
+                words.update(alternative.split())
+        for template, _, _ in self.templates:
+            words.update(word for word in template.split() if not word.startswith("{"))
+        return words
+
+    def expand(self):
+        """
+        Materialize the full {phrase: handler} table (for inspection only)
+        """
+        table = {}
+        for template, handler, _ in self.templates:
+            capture = self.capture_name(template)
+            for parts in itertools.product(*self._parse(template)):
+                phrase = " ".join(parts)
+                table[f"{phrase} <{capture}>" if capture else phrase] = handler
+        return table
@@ -0,0 +1,252 @@
+from array import array
+from bisect import bisect_left
+from collections import deque, namedtuple
+
+# A single phrase occurrence found in a transcript
+CommandMatch = namedtuple("CommandMatch", ["start", "end", "phrase", "handler", "priority"])
+
+class CommandMatcher:
+    """
+    Aho-Corasick automaton over command phrases.
+
+    The automaton is built once from the command table and then finds every
+    phrase in a transcript in a single pass, independent of how many phrases
+    are registered. Only whole-word occurrences count, so "hi" does not fire
+    inside "this".
+    """
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._patterns = []     # pattern id -> (phrase, handler, priority)
+        self._index = {}        # phrase -> pattern id
+        self._compiled = True
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def __contains__(self, phrase):
+        return phrase.lower() in self._index
+
+    def add(self, phrase, handler, priority=0):
+        """
+        Register a phrase. Re-adding a phrase replaces its handler, like a dict key
+        """
+        phrase = phrase.lower()
+        if not phrase:
+            return
+
+        if phrase in self._index:
+            self._patterns[self._index[phrase]] = (phrase, handler, priority)
+            return
+
+        state = 0
+        for ch in phrase:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][ch] = next_state
+            state = next_state
+
+        pattern_id = len(self._patterns)
+        self._patterns.append((phrase, handler, priority))
+        self._index[phrase] = pattern_id
+        self._output[state].append(pattern_id)
+        self._compiled = False
+
+    def update(self, commands, priority=0):
+        """
+        Register every phrase of a {phrase: handler} table
+        """
+        for phrase, handler in commands.items():
+            self.add(phrase, handler, priority)
+
+    def compile(self):
+        """
+        Compute failure links and merge suffix outputs (breadth-first)
+        """
+        if self._compiled:
+            return self
+
+        # Outputs are rebuilt from scratch so compile() can run again after add()
+        outputs = [[] for _ in self._goto]
+        for pattern_id, (phrase, _, _) in enumerate(self._patterns):
+            state = 0
+            for ch in phrase:
+                state = self._goto[state][ch]
+            outputs[state].append(pattern_id)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                outputs[next_state] = outputs[next_state] + outputs[self._fail[next_state]]
+
+        self._output = outputs
+        self._compiled = True
+        return self
+
+    def find_all(self, text):
+        """
+        Return every whole-word phrase occurrence in the text, in order of their end position
+        """
+        if not self._compiled:
+            self.compile()
+
+        text = text.lower()
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        length = len(text)
+        matches = []
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            if not output[state]:
+                continue
+
+            end = i + 1
+            if end < length and text[end].isalnum():
+                continue
+
+            for pattern_id in output[state]:
+                phrase, handler, priority = patterns[pattern_id]
+                start = end - len(phrase)
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                matches.append(CommandMatch(start, end, phrase, handler, priority))
+
+        return matches
+
+    def match(self, text):
+        """
+        Return the best match: longest phrase first, then highest priority, then earliest
+        """
+        best = None
+        best_key = None
+        for found in self.find_all(text):
+            key = (found.end - found.start, found.priority, -found.start)
+            if best is None or key > best_key:
+                best, best_key = found, key
+        return best
+
+class PackedMatcher:
+    """
+    Read-only, flat-array form of a compiled CommandMatcher.
+
+    Transitions are stored CSR-style (per-state offsets into sorted character
+    codes and targets), so the automaton can be written to disk as-is and used
+    directly from memoryviews over an mmap'd file. The handler of each match is
+    the pattern id, i.e. the registration order in the source matcher.
+    """
+    ARRAYS = ("trans_offset", "trans_char", "trans_target", "fail",
+              "out_offset", "out_ids", "pattern_length", "pattern_priority")
+    # Every array is unsigned 32-bit except the (possibly negative) priorities
+    TYPECODES = {"pattern_priority": "i"}
+
+    def __init__(self, arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+        # The root is visited on almost every character; keep it as a dict
+        lo, hi = self.trans_offset[0], self.trans_offset[1]
+        self._root = {chr(self.trans_char[i]): self.trans_target[i] for i in range(lo, hi)}
+
+    def __len__(self):
+        return len(self.pattern_length)
+
+    @classmethod
+    def from_matcher(cls, matcher):
+        """
+        Flatten a CommandMatcher into typed arrays
+        """
+        matcher.compile()
+        arrays = {name: array(cls.TYPECODES.get(name, "I")) for name in cls.ARRAYS}
+
+        arrays["trans_offset"].append(0)
+        arrays["out_offset"].append(0)
+        for state, transitions in enumerate(matcher._goto):
+            for ch in sorted(transitions):
+                arrays["trans_char"].append(ord(ch))
+                arrays["trans_target"].append(transitions[ch])
+            arrays["trans_offset"].append(len(arrays["trans_char"]))
+            arrays["fail"].append(matcher._fail[state])
+            arrays["out_ids"].extend(matcher._output[state])
+            arrays["out_offset"].append(len(arrays["out_ids"]))
+
+        for phrase, _, priority in matcher._patterns:
+            arrays["pattern_length"].append(len(phrase))
+            arrays["pattern_priority"].append(priority)
+
+        return cls(arrays)
+
+    def _next(self, state, ch):
+        """
+        Follow a goto transition, or return -1 if there is none
+        """
+        if state == 0:
+            return self._root.get(ch, -1)
+        code = ord(ch)
+        lo, hi = self.trans_offset[state], self.trans_offset[state + 1]
+        i = bisect_left(self.trans_char, code, lo, hi)
+        if i < hi and self.trans_char[i] == code:
+            return self.trans_target[i]
+        return -1
+
+    def find_all(self, text):
+        """
+        Return every whole-word phrase occurrence in the text, in order of their end position
+        """
+        text = text.lower()
+        fail, out_offset, out_ids = self.fail, self.out_offset, self.out_ids
+        pattern_length, pattern_priority = self.pattern_length, self.pattern_priority
+        length = len(text)
+        matches = []
+        state = 0
+
+        for i, ch in enumerate(text):
+            next_state = self._next(state, ch)
+            while next_state < 0 and state:
+                state = fail[state]
+                next_state = self._next(state, ch)
+            state = max(next_state, 0)
+
+            lo, hi = out_offset[state], out_offset[state + 1]
+            if lo == hi:
+                continue
+
+            end = i + 1
+            if end < length and text[end].isalnum():
+                continue
+
+            for pattern_id in out_ids[lo:hi]:
+                start = end - pattern_length[pattern_id]
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                matches.append(CommandMatch(start, end, text[start:end], pattern_id, pattern_priority[pattern_id]))
+
+        return matches
+
+    def match(self, text):
+        """
+        Return the best match: longest phrase first, then highest priority, then earliest
+        """
+        best = None
+        best_key = None
+        for found in self.find_all(text):
+            key = (found.end - found.start, found.priority, -found.start)
+            if best is None or key > best_key:
+                best, best_key = found, key
+        return best
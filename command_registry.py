@@ -0,0 +1,283 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from collections.abc import Sequence
+from command_grammar import CommandGrammar, GrammarRule
+from command_matcher import PackedMatcher
+import text_normalizer
+
+# Bump whenever the binary layout or the compilation rules change
+FORMAT_VERSION = 2
+MAGIC = b"VACI"
+
+# magic, format version, byte order, source hash, meta offset, meta length
+HEADER = struct.Struct("<4sII32sII")
+# byte offset and byte length of each packed array
+SECTION = struct.Struct("<II")
+
+# Rule tables stored alongside the matcher arrays (CSR-style offsets)
+GRAMMAR_ARRAYS = ("rule_offset", "element_offset", "element_frags", "rule_priority",
+                  "rule_action", "first_offset", "first_rules", "template_offset")
+
+# Section order and typecode of every array in the index file
+SECTIONS = ([(name, PackedMatcher.TYPECODES.get(name, "I")) for name in PackedMatcher.ARRAYS]
+            + [(name, "i" if name == "rule_priority" else "I") for name in GRAMMAR_ARRAYS]
+            + [("template_blob", "B")])
+
+BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+# What a matched phrase does: call a handler by ID or render a response template
+CommandAction = namedtuple("CommandAction", ["intent", "handler", "response"])
+
+class CommandRegistry:
+    """
+    Versioned on-disk command registry.
+
+    Source definitions (a JSON file of slots and rules, plus an optional user
+    commands file) map phrases to handler IDs and response templates. They are
+    compiled once into a binary index that holds the packed fragment automaton;
+    later startups mmap the index and skip compilation entirely unless the
+    source definitions have changed.
+    """
+    def __init__(self, definitions_file, index_file, user_commands_file=None):
+        self.definitions_file = definitions_file
+        self.index_file = index_file
+        self.user_commands_file = user_commands_file
+        self._mapped = None
+
+    def source_hash(self):
+        """
+        Digest of the format version, the text normalization tables and every source definition file
+        """
+        digest = hashlib.sha256(f"format-{FORMAT_VERSION}".encode())
+        # Phrases are compiled in normalized form
+        digest.update(text_normalizer.fingerprint())
+        for path in (self.definitions_file, self.user_commands_file):
+            digest.update(b"\0")
+            if path and os.path.exists(path):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        return digest.digest()
+
+    def load(self):
+        """
+        Return the compiled command grammar, rebuilding the index only if it is stale
+        """
+        digest = self.source_hash()
+        grammar = None
+
+        if os.path.exists(self.index_file):
+            try:
+                grammar = self._read_index(digest)
+            except Exception as e:
+                print(f"Error reading command index: {e}")
+
+        if grammar is None:
+            grammar = self.build(digest)
+        return grammar
+
+    def build(self, digest=None):
+        """
+        Compile the source definitions and write a fresh index
+        """
+        if digest is None:
+            digest = self.source_hash()
+
+        grammar = self._compile()
+
+        try:
+            self._write_index(grammar, digest)
+        except OSError as e:
+            print(f"Could not write command index: {e}")
+
+        return grammar
+
+    def _read_sources(self):
+        """
+        Load the definitions file and the optional user commands file
+        """
+        with open(self.definitions_file, 'r', encoding='utf-8') as f:
+            definitions = json.load(f)
+
+        user_commands = {}
+        if self.user_commands_file and os.path.exists(self.user_commands_file):
+            try:
+                with open(self.user_commands_file, 'r', encoding='utf-8') as f:
+                    user_commands = json.load(f)
+            except Exception as e:
+                print(f"Error loading commands file: {e}")
+
+        return definitions, user_commands
+
+    def _compile(self):
+        """
+        Build a CommandGrammar whose rule handlers are CommandAction tuples
+        """
+        definitions, user_commands = self._read_sources()
+        grammar = CommandGrammar()
+
+        for name, alternatives in definitions.get("slots", {}).items():
+            grammar.add_slot(name, alternatives)
+
+        for rule in definitions.get("rules", []):
+            action = CommandAction(rule.get("intent", "custom"), rule.get("handler"), rule.get("response"))
+            grammar.add_rule(rule["template"], action, rule.get("priority", 0))
+
+        # User commands map a phrase to a response string or to a rule-like object
+        for phrase, entry in user_commands.items():
+            if not isinstance(entry, dict):
+                entry = {"response": str(entry)}
+            action = CommandAction(entry.get("intent", "custom"), entry.get("handler"), entry.get("response"))
+            grammar.add_rule(phrase, action, entry.get("priority", 1))
+
+        return grammar.compile()
+
+    def _write_index(self, grammar, digest):
+        """
+        Serialize the packed fragment automaton, rule tables and action metadata
+        """
+        packed = PackedMatcher.from_matcher(grammar.matcher)
+        arrays = {name: getattr(packed, name) for name in PackedMatcher.ARRAYS}
+        arrays.update({name: array(typecode) for name, typecode in SECTIONS if name not in arrays})
+
+        actions = []
+        action_ids = {}
+        arrays["rule_offset"].append(0)
+        arrays["element_offset"].append(0)
+        arrays["template_offset"].append(0)
+        for rule in grammar.rules:
+            if rule.handler not in action_ids:
+                action_ids[rule.handler] = len(actions)
+                actions.append(list(rule.handler))
+            for element in rule.elements:
+                arrays["element_frags"].extend(sorted(element))
+                arrays["element_offset"].append(len(arrays["element_frags"]))
+            arrays["rule_offset"].append(len(arrays["element_offset"]) - 1)
+            arrays["rule_priority"].append(rule.priority)
+            arrays["rule_action"].append(action_ids[rule.handler])
+            arrays["template_blob"].frombytes(rule.template.encode('utf-8'))
+            arrays["template_offset"].append(len(arrays["template_blob"]))
+
+        arrays["first_offset"].append(0)
+        for fragment_id in range(len(grammar.fragments)):
+            arrays["first_rules"].extend(grammar._first.get(fragment_id, ()))
+            arrays["first_offset"].append(len(arrays["first_rules"]))
+
+        meta = json.dumps({"slots": grammar.slots, "actions": actions,
+                           "count": grammar.count()}).encode('utf-8')
+
+        sections = []
+        body = bytearray()
+        offset = HEADER.size + SECTION.size * len(SECTIONS)
+        for name, _ in SECTIONS:
+            data = arrays[name].tobytes()
+            sections.append(SECTION.pack(offset + len(body), len(data)))
+            body += data
+
+        meta_offset = offset + len(body)
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, digest, meta_offset, len(meta))
+
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(header)
+            f.write(b"".join(sections))
+            f.write(body)
+            f.write(meta)
+        os.replace(temp_file, self.index_file)
+
+    def _read_index(self, digest):
+        """
+        Map the index file and wrap it as a grammar, or return None if it is stale
+        """
+        with open(self.index_file, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = None
+        arrays = {}
+        try:
+            magic, version, byte_order, stored_digest, meta_offset, meta_length = HEADER.unpack_from(mapped, 0)
+            if (magic != MAGIC or version != FORMAT_VERSION or byte_order != BYTE_ORDER
+                    or stored_digest != digest or array("I").itemsize != 4):
+                mapped.close()
+                return None
+
+            view = memoryview(mapped)
+            position = HEADER.size
+            for name, typecode in SECTIONS:
+                offset, length = SECTION.unpack_from(mapped, position)
+                position += SECTION.size
+                arrays[name] = view[offset:offset + length].cast(typecode)
+
+            meta = json.loads(bytes(view[meta_offset:meta_offset + meta_length]))
+            rules = PackedRules(arrays, meta["actions"])
+        except Exception:
+            # The map can only be closed once no view of it is left
+            for section in arrays.values():
+                section.release()
+            if view is not None:
+                view.release()
+            mapped.close()
+            raise
+
+        # Keep the mapping alive for as long as the memoryviews are in use
+        self._mapped = mapped
+        return CommandGrammar.from_compiled(meta["slots"], PackedTemplates(rules), PackedMatcher(arrays),
+                                            rules, PackedFirstIndex(arrays), meta["count"])
+
+class PackedRules(Sequence):
+    """
+    Grammar rules decoded on demand from the index arrays and raw action lists
+    """
+    def __init__(self, arrays, actions):
+        self.arrays = arrays
+        self.actions = actions
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.arrays["rule_priority"])
+
+    def __getitem__(self, rule_id):
+        rule = self._cache.get(rule_id)
+        if rule is None:
+            a = self.arrays
+            elements = tuple(frozenset(a["element_frags"][a["element_offset"][e]:a["element_offset"][e + 1]])
+                             for e in range(a["rule_offset"][rule_id], a["rule_offset"][rule_id + 1]))
+            template = bytes(a["template_blob"][a["template_offset"][rule_id]:a["template_offset"][rule_id + 1]])
+            action = CommandAction(*self.actions[a["rule_action"][rule_id]])
+            template = template.decode('utf-8')
+            rule = GrammarRule(template, elements, action, a["rule_priority"][rule_id],
+                               CommandGrammar.capture_name(template))
+            self._cache[rule_id] = rule
+        return rule
+
+class PackedTemplates(Sequence):
+    """
+    (template, handler, priority) view over packed rules, used by count() and expand()
+    """
+    def __init__(self, rules):
+        self.rules = rules
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __getitem__(self, rule_id):
+        rule = self.rules[rule_id]
+        return (rule.template, rule.handler, rule.priority)
+
+class PackedFirstIndex:
+    """
+    Fragment id -> ids of the rules whose first element contains it
+    """
+    def __init__(self, arrays):
+        self.offsets = arrays["first_offset"]
+        self.rules = arrays["first_rules"]
+
+    def get(self, fragment_id, default=()):
+        if fragment_id + 1 >= len(self.offsets):
+            return default
+        return self.rules[self.offsets[fragment_id]:self.offsets[fragment_id + 1]]
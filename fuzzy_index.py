@@ -0,0 +1,154 @@
+import itertools
+from collections import namedtuple
+
+# A grammar match found after correcting the transcript
+FuzzyMatch = namedtuple("FuzzyMatch", ["match", "distance", "text"])
+
+def edit_distance(a, b, limit):
+    """
+    Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it is exceeded
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class FuzzyIndex:
+    """
+    Recognition-error-tolerant lookup in front of a CommandGrammar.
+
+    Words of the transcript that are not in the command vocabulary ("joe",
+    "thyme") are looked up in a SymSpell-style deletion dictionary: every
+    vocabulary word is indexed under the strings obtained by deleting up to
+    `max_distance` characters from its first `prefix_length` characters, so a
+    misheard word finds its candidates with a handful of dictionary lookups
+    instead of a scan. Corrected variants of the transcript, cheapest first,
+    are then run through the exact grammar; the best match within the edit
+    budget wins. Unknown words may also be left as they are, since they are
+    often just filler around a command. The dictionary is built on the first
+    lookup. extra_words adds words that capture slots accept (such as
+    arithmetic terms) to the vocabulary. Rules of exclude_intents are never
+    reached through a correction, only by saying them exactly.
+    """
+    def __init__(self, grammar, max_distance=2, max_candidates=3, max_variants=24, prefix_length=7,
+                 extra_words=(), exclude_intents=("stop",)):
+        self.grammar = grammar
+        self.extra_words = set(extra_words)
+        # A correction should never shut the assistant down ("exited", "does god exist")
+        self.exclude_intents = set(exclude_intents)
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self.max_variants = max_variants
+        self.prefix_length = prefix_length
+        self.vocabulary = None
+        self._deletes = None
+
+    def build(self):
+        """
+        Index the grammar's vocabulary by its deletion variants
+        """
+        command_words = self.grammar.vocabulary()
+        self.vocabulary = command_words | self.extra_words
+        # On equal distance, command words are preferred over capture-only words
+        self._extra_only = self.extra_words - command_words
+        deletes = {}
+        for word in self.vocabulary:
+            for variant in self._variants(word):
+                deletes.setdefault(variant, []).append(word)
+        self._deletes = deletes
+        return self
+
+    def _variants(self, word):
+        """
+        The word's prefix and every string made by deleting up to max_distance characters from it
+        """
+        prefix = word[:self.prefix_length]
+        variants = {prefix}
+        frontier = {prefix}
+        for _ in range(self.max_distance):
+            frontier = {term[:i] + term[i + 1:] for term in frontier for i in range(len(term))}
+            variants |= frontier
+        return variants
+
+    def budget(self, word):
+        """
+        Edits allowed for one word: none for one or two letters, then one per two letters
+        """
+        return min(self.max_distance, (len(word) - 1) // 2)
+
+    def corrections(self, word):
+        """
+        Vocabulary words within the word's edit budget as (distance, word), closest first
+        """
+        if self._deletes is None:
+            self.build()
+        limit = self.budget(word)
+        if limit <= 0:
+            return []
+
+        found = {}
+        for variant in self._variants(word):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate not in found:
+                    found[candidate] = edit_distance(word, candidate, limit)
+        ranked = sorted((distance, candidate in self._extra_only, candidate)
+                        for candidate, distance in found.items() if distance <= limit)
+        return [(distance, candidate) for distance, _, candidate in ranked[:self.max_candidates]]
+
+    def match(self, text, tokens=None):
+        """
+        Return the best FuzzyMatch for a normalized transcript the exact grammar missed, or None
+
+        tokens are the transcript's words when the caller already has them (see text_normalizer).
+        """
+        if self._deletes is None:
+            self.build()
+
+        words = list(tokens) if tokens is not None else text.split()
+        edits = []
+        for index, word in enumerate(words):
+            if word in self.vocabulary or not word.replace("'", "").isalpha():
+                continue
+            edits.extend((distance, index, correction) for distance, correction in self.corrections(word))
+
+        # Every edit costs at least one, so at most max_distance words change in a variant
+        variants = []
+        for size in range(1, self.max_distance + 1):
+            for combination in itertools.combinations(edits, size):
+                distance = sum(edit[0] for edit in combination)
+                if distance > self.max_distance or len({edit[1] for edit in combination}) < size:
+                    continue
+                corrected = list(words)
+                for _, index, correction in combination:
+                    corrected[index] = correction
+                variants.append((distance, corrected))
+        variants.sort(key=lambda variant: variant[0])
+
+        best = None
+        best_key = None
+        for distance, corrected in variants[:self.max_variants]:
+            if best is not None and distance > best.distance:
+                break
+            corrected_text = " ".join(corrected)
+            found = self.grammar.match(corrected_text)
+            if found is None or getattr(found.handler, "intent", None) in self.exclude_intents:
+                continue
+            key = (-distance, found.end - found.start, found.priority)
+            if best is None or key > best_key:
+                best, best_key = FuzzyMatch(found, distance, corrected_text), key
+        return best
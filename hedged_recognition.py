@@ -0,0 +1,166 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import LatencyHistogram, censored_percentile
+from recognizer_backends import (RecognizerBackend, RecognitionError, RecognitionTimeout,
+                                 SpeechNotUnderstood)
+
+class HedgedBackend(RecognizerBackend):
+    """
+    Hedged recognition across one or more backends.
+
+    Each request goes to the first backend. If no acceptable answer arrives
+    within the hedge delay, the same audio also goes to the next backend, or
+    is retried on the last one. The hedge delay defaults to the p95 of the
+    latency already observed for that backend. The first acceptable result
+    wins and the other attempts are cancelled, or abandoned if they are
+    blocking calls. A failed attempt triggers the next one immediately.
+    Hedges are capped at `hedge_budget` of all requests, so the extra load
+    stays a few percent rather than doubling it.
+
+    Every attempt's latency is recorded, including losers: an abandoned
+    blocking call records its real latency when it finishes in the
+    background. A cancelled coroutine only tells us it took longer than it
+    ran, so that time goes into a separate histogram of lower bounds, and
+    the hedge delay is a Kaplan-Meier percentile over both (see
+    metrics.censored_percentile). Dropping the losers, or recording their
+    lower bounds as latencies, would pull the hedge delay below the real p95.
+    """
+    name = "hedged"
+    native_async = True
+
+    def __init__(self, backends, hedge_percentile=0.95, initial_delay=0.5, min_delay=0.05,
+                 max_delay=3.0, min_samples=20, max_attempts=2, hedge_budget=0.1,
+                 min_confidence=0.0, timeout=None):
+        super().__init__(timeout)
+        self.backends = list(backends)
+        self.requires_audio = any(backend.requires_audio for backend in self.backends)
+        self.hedge_percentile = hedge_percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_attempts = max_attempts
+        self.hedge_budget = hedge_budget
+        self.min_confidence = min_confidence
+        self.histograms = [LatencyHistogram() for _ in self.backends]
+        # Run time of cancelled attempts: their latency was at least this long
+        self.censored = [LatencyHistogram() for _ in self.backends]
+        self.stats = {"requests": 0, "hedges": 0, "hedge_wins": 0, "failovers": 0}
+        # Blocking backends run here so abandoned attempts never hold up the caller
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(self.backends) * max_attempts,
+                                            thread_name_prefix="hedged-recognition")
+
+    def _backend_index(self, attempt):
+        return min(attempt, len(self.backends) - 1)
+
+    def hedge_delay(self, attempt):
+        """
+        How long to wait on an attempt before hedging it
+        """
+        index = self._backend_index(attempt)
+        histogram = self.histograms[index]
+        if histogram.count + self.censored[index].count < self.min_samples:
+            return self.initial_delay
+        delay = censored_percentile(histogram, self.censored[index], self.hedge_percentile, self.max_delay)
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def _can_hedge(self, attempts):
+        if attempts >= self.max_attempts:
+            return False
+        return self.stats["hedges"] < self.hedge_budget * self.stats["requests"] + 1
+
+    def _acceptable(self, result):
+        if not result.text:
+            return False
+        return result.confidence is None or result.confidence >= self.min_confidence
+
+    def _launch(self, attempt, audio, timeout):
+        index = self._backend_index(attempt)
+        backend = self.backends[index]
+        if backend.native_async:
+            return asyncio.ensure_future(backend.recognize_async(audio, timeout))
+        loop = asyncio.get_running_loop()
+        return asyncio.ensure_future(loop.run_in_executor(self._executor, self._timed_recognize, index, audio, timeout))
+
+    def _timed_recognize(self, index, audio, timeout):
+        """
+        Blocking recognition that records its own latency, even after the caller has moved on
+        """
+        start = time.perf_counter()
+        result = self.backends[index].recognize(audio, timeout)
+        self.histograms[index].record(time.perf_counter() - start)
+        return result
+
+    async def recognize_async(self, audio, timeout=None):
+        """
+        Race hedged attempts and return the first acceptable RecognitionResult
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        self.stats["requests"] += 1
+        start = time.perf_counter()
+        pending = {self._launch(0, audio, timeout): (0, start)}
+        attempts = 1
+        last_error = None
+
+        try:
+            while pending:
+                elapsed = time.perf_counter() - start
+                remaining = None if timeout is None else timeout - elapsed
+                if remaining is not None and remaining <= 0:
+                    raise RecognitionTimeout(f"no backend answered within {timeout}s")
+
+                wait = remaining
+                if self._can_hedge(attempts):
+                    newest_start = max(started for _, started in pending.values())
+                    hedge_in = self.hedge_delay(attempts - 1) - (time.perf_counter() - newest_start)
+                    wait = max(0.0, hedge_in) if wait is None else min(wait, max(0.0, hedge_in))
+
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if self._can_hedge(attempts):
+                        pending[self._launch(attempts, audio, timeout)] = (attempts, time.perf_counter())
+                        attempts += 1
+                        self.stats["hedges"] += 1
+                    continue
+
+                for task in done:
+                    attempt, started = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except RecognitionError as e:
+                        last_error = e
+                        result = None
+
+                    if result is not None:
+                        index = self._backend_index(attempt)
+                        if self.backends[index].native_async:
+                            self.histograms[index].record(time.perf_counter() - started)
+                        if self._acceptable(result):
+                            if attempt > 0:
+                                self.stats["hedge_wins"] += 1
+                            return result._replace(latency=time.perf_counter() - start)
+                        last_error = SpeechNotUnderstood("result below the confidence threshold")
+
+                    # Failed or unacceptable: fail over immediately instead of waiting out the hedge delay
+                    if not pending and attempts < self.max_attempts:
+                        pending[self._launch(attempts, audio, timeout)] = (attempts, time.perf_counter())
+                        attempts += 1
+                        self.stats["failovers"] += 1
+
+            raise last_error or SpeechNotUnderstood("no backend returned a transcript")
+        finally:
+            now = time.perf_counter()
+            for task, (attempt, started) in pending.items():
+                task.cancel()
+                # Blocking calls keep running and record themselves; a cancelled coroutine took at least this long
+                index = self._backend_index(attempt)
+                if self.backends[index].native_async:
+                    self.censored[index].record(now - started)
+
+    def recognize(self, audio, timeout=None):
+        """
+        Blocking hedged recognition (runs a private event loop)
+        """
+        return asyncio.run(self.recognize_async(audio, timeout))
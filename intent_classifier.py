@@ -0,0 +1,181 @@
+import itertools
+import math
+import random
+from collections import namedtuple
+
+# Best intent for an utterance and its cosine similarity to that intent's centroid
+IntentMatch = namedtuple("IntentMatch", ["intent", "action", "confidence"])
+
+class IntentClassifier:
+    """
+    Character n-gram TF-IDF nearest-centroid intent classifier.
+
+    The training data is the grammar itself: each rule's phrases (all of
+    them, or a seeded sample for very large rules) are turned into L2
+    normalized TF-IDF vectors over character n-grams, and the phrases of
+    each action are averaged into one centroid. Centroids are stored as an
+    inverted index (n-gram -> [(class, weight)]), so scoring an utterance
+    against every intent is one sparse matrix-vector product that only
+    touches the n-grams the utterance contains. Classes are the distinct
+    actions; several classes may share an intent name.
+
+    Most phrases share an "ask" prefix ("what is", "tell me"), so the IDF of
+    each n-gram is also scaled down by how many classes use it: n-grams
+    every intent has say nothing about which one was meant. N-grams the
+    grammar has never seen still count towards the length of an utterance's
+    vector (at the mean IDF), so words from outside the assistant's domain
+    ("the capital of france") dilute the similarity instead of vanishing.
+    """
+    def __init__(self, grammar, ngram_sizes=(3,), threshold=0.35, phrases_per_rule=200,
+                 exclude_intents=("stop",), seed=0):
+        self.grammar = grammar
+        self.ngram_sizes = ngram_sizes
+        self.threshold = threshold
+        self.phrases_per_rule = phrases_per_rule
+        # A guess should never shut the assistant down
+        self.exclude_intents = set(exclude_intents)
+        self.seed = seed
+        self.actions = None
+        self.idf = None
+        self.unseen_idf = None
+        self._index = None
+
+    def ngrams(self, text):
+        """
+        Character n-gram counts of a normalized phrase, padded so word edges are features
+        """
+        padded = f" {text} "
+        counts = {}
+        for size in self.ngram_sizes:
+            for i in range(len(padded) - size + 1):
+                gram = padded[i:i + size]
+                counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def _phrases(self, rule_id, template):
+        """
+        Phrases of one rule, sampled when the rule expands to more than phrases_per_rule
+        """
+        elements = self.grammar._parse(template)
+        size = 1
+        for alternatives in elements:
+            size *= len(alternatives)
+        if size <= self.phrases_per_rule:
+            return [" ".join(parts) for parts in itertools.product(*elements)]
+        rng = random.Random(self.seed + rule_id)
+        return [" ".join(rng.choice(alternatives) for alternatives in elements)
+                for _ in range(self.phrases_per_rule)]
+
+    def build(self):
+        """
+        Compute IDF weights and the per-action centroids from the grammar's phrases
+        """
+        samples = []
+        class_ids = {}
+        self.actions = []
+        for rule_id, (template, action, _) in enumerate(self.grammar.templates):
+            # Rules with a capture slot need its text, which a guessed intent does not have
+            if action.intent in self.exclude_intents or self.grammar.capture_name(template):
+                continue
+            if action not in class_ids:
+                class_ids[action] = len(self.actions)
+                self.actions.append(action)
+            for phrase in self._phrases(rule_id, template):
+                samples.append((class_ids[action], self.ngrams(phrase)))
+
+        document_frequency = {}
+        gram_classes = {}
+        for class_id, counts in samples:
+            for gram in counts:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+                gram_classes.setdefault(gram, set()).add(class_id)
+        total = len(samples)
+        classes = len(self.actions)
+        self.idf = {}
+        for gram, df in document_frequency.items():
+            # 1 for an n-gram only one class uses, close to 0 for one that every class uses
+            specificity = math.log((1 + classes) / len(gram_classes[gram])) / math.log(1 + classes)
+            self.idf[gram] = (math.log((1 + total) / (1 + df)) + 1) * specificity
+        self.unseen_idf = sum(self.idf.values()) / len(self.idf) if self.idf else 0.0
+
+        centroids = [{} for _ in self.actions]
+        for class_id, counts in samples:
+            for gram, weight in self._vector(counts).items():
+                centroid = centroids[class_id]
+                centroid[gram] = centroid.get(gram, 0.0) + weight
+
+        index = {}
+        for class_id, centroid in enumerate(centroids):
+            norm = math.sqrt(sum(weight * weight for weight in centroid.values())) or 1.0
+            for gram, weight in centroid.items():
+                index.setdefault(gram, []).append((class_id, weight / norm))
+        self._index = index
+        return self
+
+    def _vector(self, counts):
+        """
+        L2-normalized TF-IDF vector of n-gram counts
+
+        Unseen n-grams are weighted at unseen_idf for the norm, then dropped,
+        since no centroid contains them.
+        """
+        vector = {gram: count * self.idf.get(gram, self.unseen_idf) for gram, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {gram: weight / norm for gram, weight in vector.items() if gram in self.idf}
+
+    def _best(self, scores):
+        if not scores:
+            return None
+        class_id = max(scores, key=scores.get)
+        if scores[class_id] < self.threshold:
+            return None
+        action = self.actions[class_id]
+        return IntentMatch(action.intent, action, scores[class_id])
+
+    def scores(self, text):
+        """
+        Cosine similarity of an utterance to every intent centroid it shares n-grams with
+        """
+        if self._index is None:
+            self.build()
+        scores = {}
+        for gram, weight in self._vector(self.ngrams(text)).items():
+            for class_id, class_weight in self._index[gram]:
+                scores[class_id] = scores.get(class_id, 0.0) + weight * class_weight
+        return scores
+
+    def classify(self, text):
+        """
+        Return the top IntentMatch, or None when it is below the confidence threshold
+        """
+        return self._best(self.scores(text))
+
+    def classify_batch(self, texts):
+        """
+        Classify many utterances at once; returns one IntentMatch or None per text
+
+        The distinct texts form a sparse utterance x n-gram matrix, stored by
+        column (n-gram -> [(row, weight)]), and the scores are its product with
+        the centroid index: each n-gram's centroid weights are read once for
+        the whole batch rather than once per utterance that contains it.
+        Transcripts repeat heavily in practice, so each distinct text is one row.
+        """
+        if self._index is None:
+            self.build()
+        rows = {}
+        columns = {}
+        for text in texts:
+            if text not in rows:
+                row = rows[text] = len(rows)
+                for gram, weight in self._vector(self.ngrams(text)).items():
+                    columns.setdefault(gram, []).append((row, weight))
+
+        scores = [{} for _ in rows]
+        for gram, entries in columns.items():
+            postings = self._index[gram]
+            for row, weight in entries:
+                row_scores = scores[row]
+                for class_id, class_weight in postings:
+                    row_scores[class_id] = row_scores.get(class_id, 0.0) + weight * class_weight
+        best = [self._best(row_scores) for row_scores in scores]
+        return [best[rows[text]] for text in texts]
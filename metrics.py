@@ -0,0 +1,168 @@
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with approximate percentiles.
+
+    Buckets grow geometrically from `min_seconds` to `max_seconds`, so memory
+    stays constant however many samples are recorded and percentiles are
+    accurate to within one bucket width (about 10% by default).
+    """
+    def __init__(self, min_seconds=0.001, max_seconds=60.0, growth=1.1):
+        count = int(math.ceil(math.log(max_seconds / min_seconds) / math.log(growth))) + 1
+        self.bounds = [min_seconds * growth ** i for i in range(count)]
+        self.counts = [0] * (count + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """
+        Add one latency sample
+        """
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, fraction, default=None):
+        """
+        Upper bound of the bucket holding the given fraction of samples
+        """
+        with self._lock:
+            if not self.count:
+                return default
+            target = fraction * self.count
+            seen = 0
+            for index, bucket in enumerate(self.counts):
+                seen += bucket
+                if seen >= target and bucket:
+                    return self.bounds[min(index, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+def censored_percentile(observed, censored, fraction, default=None):
+    """
+    Percentile of latencies where some samples are only known lower bounds
+
+    observed holds complete latencies and censored the times at which other
+    requests were given up on, in histograms with the same buckets. This is
+    the Kaplan-Meier estimate over the buckets: a censored sample leaves the
+    population still waiting once its bound has passed, but never counts as
+    having finished, so it cannot pull the percentile down. Returns default
+    when the estimate never reaches the fraction (the rest were all given up on).
+    """
+    with observed._lock:
+        finished = list(observed.counts)
+    with censored._lock:
+        abandoned = list(censored.counts)
+    waiting = sum(finished) + sum(abandoned)
+    surviving = 1.0
+    for index, (done, dropped) in enumerate(zip(finished, abandoned)):
+        if done:
+            surviving *= 1.0 - done / waiting
+            if 1.0 - surviving >= fraction - 1e-9:
+                return observed.bounds[min(index, len(observed.bounds) - 1)]
+        waiting -= done + dropped
+    return default
+
+class MetricsRegistry:
+    """
+    Named latency histograms for the stages of the assistant loop.
+
+    Stages are timed with span() (or observe() for durations measured
+    elsewhere) and can be exported as JSON or in the Prometheus text format,
+    or summarized as a one-line readout of the latest turn.
+    """
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, prefix="assistant", min_seconds=0.00001):
+        self.prefix = prefix
+        # Matching and handlers take well under a millisecond, so the buckets start lower
+        self.min_seconds = min_seconds
+        self.histograms = {}
+        self.last = {}
+        self.updates = 0
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """
+        Record one duration for a stage
+        """
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram(self.min_seconds))
+        histogram.record(seconds)
+        self.last[stage] = seconds
+        self.updates += 1
+
+    @contextmanager
+    def span(self, stage):
+        """
+        Time the body of a with block as one sample of a stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Per-stage count, mean, last value and quantiles, in milliseconds
+        """
+        stages = {}
+        for stage, histogram in list(self.histograms.items()):
+            summary = {"count": histogram.count,
+                       "mean_ms": round(histogram.mean() * 1000, 3),
+                       "last_ms": round(self.last.get(stage, 0.0) * 1000, 3)}
+            for quantile in self.QUANTILES:
+                summary[f"p{int(quantile * 100)}_ms"] = round(histogram.percentile(quantile, 0.0) * 1000, 3)
+            stages[stage] = summary
+        return stages
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition: one summary with a stage label
+        """
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of each assistant loop stage.", f"# TYPE {name} summary"]
+        for stage, histogram in sorted(self.histograms.items()):
+            for quantile in self.QUANTILES:
+                value = histogram.percentile(quantile, 0.0)
+                lines.append(f'{name}{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """
+        Write the metrics to a file: Prometheus text for .prom/.txt, JSON otherwise
+        """
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def readout(self, stages=None):
+        """
+        Short "stage 123ms" summary of the latest turn, e.g. for a status bar
+        """
+        stages = stages or list(self.last)
+        parts = []
+        for stage in stages:
+            if stage in self.last:
+                milliseconds = self.last[stage] * 1000
+                parts.append(f"{stage} {milliseconds:.1f}ms" if milliseconds < 10 else f"{stage} {milliseconds:.0f}ms")
+        return "  ".join(parts)
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from audio_capture import rms
+
+class NoiseCalibration:
+    """
+    Ambient-noise calibration cache, persisted per input device.
+
+    The energy threshold is measured once per device with
+    adjust_for_ambient_noise() and stored in a JSON file, so later turns and
+    later sessions skip the half-second calibration. The leading non-speech
+    part of every captured utterance feeds a rolling ambient-level window.
+    The first full window after a calibration becomes the device's ambient
+    baseline; when the mean later drifts past `tolerance` (relative to that
+    baseline), the threshold is recomputed from the window. This happens on
+    the capturing thread between listens, so it never races the
+    recognizer's own threshold adjustment.
+    """
+    def __init__(self, cache_file, tolerance=0.5, window=20, min_samples=5,
+                 calibration_seconds=0.5, ambient_seconds=0.25, dynamic_ratio=1.5):
+        self.cache_file = cache_file
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.calibration_seconds = calibration_seconds
+        self.ambient_seconds = ambient_seconds
+        self.dynamic_ratio = dynamic_ratio
+        self.devices = self._load()
+        self.ambient = {}
+        self.window = window
+        self._applied = set()
+        self._lock = threading.Lock()
+        self.stats = {"turns": 0, "calibrations": 0, "cache_hits": 0, "recalibrations": 0,
+                      "calibration_ms": [], "startup_cache_hit": False}
+
+    def _load(self):
+        """
+        Read cached thresholds, keyed by device
+        """
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading calibration cache: {e}")
+        return {}
+
+    def save(self):
+        """
+        Persist the cached thresholds
+        """
+        with self._lock:
+            data = json.dumps(self.devices, indent=2)
+        try:
+            with open(self.cache_file, 'w') as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Could not save calibration cache: {e}")
+
+    @staticmethod
+    def device_key(source):
+        """
+        Cache key for an audio source: its device index and sample format
+        """
+        index = getattr(source, "device_index", None)
+        device = "default" if index is None else f"device-{index}"
+        return f"{device}@{source.SAMPLE_RATE}x{source.SAMPLE_WIDTH}"
+
+    def threshold_for(self, device):
+        """
+        Cached energy threshold for a device, or None
+        """
+        entry = self.devices.get(device)
+        return entry["energy_threshold"] if entry else None
+
+    def store(self, device, energy_threshold, ambient=None):
+        """
+        Record a new threshold for a device (e.g. one a segmenter adapted to)
+
+        ambient is the measured ambient RMS behind it; without one the
+        previously measured level, if any, is kept.
+        """
+        with self._lock:
+            if ambient is None:
+                ambient = self.devices.get(device, {}).get("ambient_rms")
+            self.devices[device] = {"energy_threshold": energy_threshold, "ambient_rms": ambient,
+                                    "updated": time.time()}
+
+    def calibrate(self, recognizer, source):
+        """
+        Apply the cached threshold, calibrating only on the first use of a device
+
+        Once applied, the recognizer's own dynamic threshold keeps tracking the
+        room between turns, so later calls leave it untouched.
+        """
+        device = self.device_key(source)
+        self.stats["turns"] += 1
+
+        cached = self.threshold_for(device)
+        if cached is not None:
+            if device not in self._applied:
+                recognizer.energy_threshold = cached
+                self._applied.add(device)
+                self.stats["startup_cache_hit"] = self.stats["turns"] == 1
+            self.stats["cache_hits"] += 1
+            return False
+
+        start = time.perf_counter()
+        recognizer.adjust_for_ambient_noise(source, duration=self.calibration_seconds)
+        self.stats["calibration_ms"].append((time.perf_counter() - start) * 1000)
+        self.stats["calibrations"] += 1
+
+        self.store(device, recognizer.energy_threshold)
+        self._applied.add(device)
+        self.save()
+        return True
+
+    def observe(self, recognizer, source, audio):
+        """
+        Track the ambient level at the start of a captured utterance and recalibrate on drift
+        """
+        device = self.device_key(source)
+        width = audio.sample_width
+        length = int(audio.sample_rate * self.ambient_seconds) * width
+        leading = memoryview(audio.frame_data).cast("B")[:length]
+        leading = leading[:len(leading) - len(leading) % width]
+        if not len(leading):
+            return
+
+        window = self.ambient.setdefault(device, deque(maxlen=self.window))
+        window.append(rms(leading, width))
+        if len(window) < self.min_samples:
+            return
+
+        level = sum(window) / len(window)
+        entry = self.devices.get(device)
+        if entry is None:
+            return
+        baseline = entry.get("ambient_rms")
+        if not baseline:
+            # First measurement since calibrating: remember it, the threshold stays
+            self.store(device, entry["energy_threshold"], level)
+            self.save()
+            return
+        if abs(level - baseline) <= self.tolerance * baseline:
+            return
+
+        window.clear()
+        self._recalibrate(recognizer, device, level)
+
+    def _recalibrate(self, recognizer, device, level):
+        """
+        Set the threshold from a drifted ambient level; called between listens
+        """
+        threshold = max(level * self.dynamic_ratio, 1)
+        recognizer.energy_threshold = threshold
+        self.store(device, threshold, level)
+        self.stats["recalibrations"] += 1
+        self.save()
+
+    def report(self):
+        """
+        Latency saved by the cache at startup and per turn
+        """
+        measured = self.stats["calibration_ms"]
+        # Without a measurement this session, assume the configured calibration time
+        per_turn_ms = sum(measured) / len(measured) if measured else self.calibration_seconds * 1000
+        return {
+            "turns": self.stats["turns"],
+            "calibrations": self.stats["calibrations"],
+            "cache_hits": self.stats["cache_hits"],
+            "recalibrations": self.stats["recalibrations"],
+            "startup_saved_ms": round(per_turn_ms if self.stats["startup_cache_hit"] else 0.0, 1),
+            "per_turn_saved_ms": round(per_turn_ms, 1),
+            "total_saved_ms": round(per_turn_ms * self.stats["cache_hits"], 1),
+        }
@@ -0,0 +1,252 @@
+import itertools
+import socket
+import threading
+import time
+from collections import namedtuple
+
+# Outcome of one recognition request
+RecognitionResult = namedtuple("RecognitionResult", ["text", "confidence", "backend", "latency"])
+
+# A hypothesis from a streaming backend; the last one has final=True and carries the RecognitionResult
+PartialResult = namedtuple("PartialResult", ["text", "final", "result"])
+
+class RecognitionError(Exception):
+    """Base class for recognition failures"""
+
+class RecognitionTimeout(RecognitionError):
+    """The backend did not answer within the timeout"""
+
+class SpeechNotUnderstood(RecognitionError):
+    """The backend answered but found no usable transcript"""
+
+class BackendUnavailable(RecognitionError):
+    """The backend could not be reached or rejected the request"""
+
+class RecognizerBackend:
+    """
+    Interface for speech recognition backends.
+
+    Subclasses implement _recognize(audio, timeout) and return a
+    (text, confidence) pair, raising RecognitionError subclasses on failure.
+    recognize() adds timing; recognize_async() runs the blocking call on a
+    worker thread with an asyncio timeout unless a subclass has a native
+    coroutine (native_async = True). Backends that produce text without audio
+    (scripted stand-ins) set requires_audio = False so callers can skip the
+    microphone entirely. Streaming backends (streaming = True) also emit
+    partial hypotheses from stream().
+    """
+    name = "backend"
+    requires_audio = True
+    native_async = False
+    streaming = False
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+    def _recognize(self, audio, timeout):
+        raise NotImplementedError
+
+    def recognize(self, audio, timeout=None):
+        """
+        Recognize audio and return a RecognitionResult
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        start = time.perf_counter()
+        text, confidence = self._recognize(audio, timeout)
+        return RecognitionResult(text, confidence, self.name, time.perf_counter() - start)
+
+    def stream(self, audio, timeout=None):
+        """
+        Yield PartialResults as recognition progresses, ending with the final one
+
+        Closing the generator early abandons the rest of the recognition.
+        Non-streaming backends yield only the final result.
+        """
+        result = self.recognize(audio, timeout)
+        yield PartialResult(result.text, True, result)
+
+    async def recognize_async(self, audio, timeout=None):
+        """
+        Awaitable recognize(); the timeout is enforced by the event loop
+        """
+        import asyncio
+
+        timeout = timeout if timeout is not None else self.timeout
+        loop = asyncio.get_running_loop()
+        call = loop.run_in_executor(None, self.recognize, audio, timeout)
+        try:
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            raise RecognitionTimeout(f"{self.name} did not answer within {timeout}s")
+
+class GoogleBackend(RecognizerBackend):
+    """
+    Adapter for speech_recognition's Google Web Speech API call
+    """
+    name = "google"
+
+    def __init__(self, recognizer=None, language="en-US", key=None, timeout=None):
+        super().__init__(timeout)
+        # Created on first use so constructing the backend stays cheap
+        self.recognizer = recognizer
+        self.language = language
+        self.key = key
+
+    def _recognize(self, audio, timeout):
+        import speech_recognition as sr
+
+        if self.recognizer is None:
+            self.recognizer = sr.Recognizer()
+        self.recognizer.operation_timeout = timeout
+        try:
+            result = self.recognizer.recognize_google(audio, key=self.key, language=self.language, show_all=True)
+        except sr.UnknownValueError as e:
+            raise SpeechNotUnderstood(str(e))
+        except sr.RequestError as e:
+            raise BackendUnavailable(str(e))
+        except (socket.timeout, TimeoutError) as e:
+            raise RecognitionTimeout(str(e))
+
+        # show_all returns [] when nothing was recognized, else the alternatives
+        alternatives = result.get("alternative") if isinstance(result, dict) else None
+        if not alternatives:
+            raise SpeechNotUnderstood("no transcript returned")
+        best = max(alternatives, key=lambda alternative: alternative.get("confidence", 0))
+        return best["transcript"], best.get("confidence")
+
+class ScriptedBackend(RecognizerBackend):
+    """
+    Deterministic local stand-in that returns scripted transcripts.
+
+    Each script entry is a transcript string, None (simulates unintelligible
+    speech) or a dict with "text", "delay", "confidence" and optionally
+    "error" ("timeout", "unavailable" or "not_understood"). Entries are
+    returned in order, after their delay (or the default delay), regardless
+    of the audio passed in; with repeat=True the script cycles forever.
+    """
+    name = "scripted"
+    requires_audio = False
+    native_async = True
+
+    def __init__(self, script, delay=0.0, confidence=1.0, repeat=False, timeout=None):
+        super().__init__(timeout)
+        self.delay = delay
+        self.confidence = confidence
+        self._entries = itertools.cycle(script) if repeat else iter(script)
+        self._lock = threading.Lock()
+
+    def _next_entry(self):
+        with self._lock:
+            try:
+                entry = next(self._entries)
+            except StopIteration:
+                raise SpeechNotUnderstood("script exhausted")
+
+        if not isinstance(entry, dict):
+            entry = {"text": entry}
+        return (entry.get("text"), entry.get("delay", self.delay),
+                entry.get("confidence", self.confidence), entry.get("error"))
+
+    @staticmethod
+    def _result(text, confidence, error):
+        if error == "timeout":
+            raise RecognitionTimeout("scripted timeout")
+        if error == "unavailable":
+            raise BackendUnavailable("scripted outage")
+        if error or text is None:
+            raise SpeechNotUnderstood("scripted unintelligible speech")
+        return text, confidence
+
+    def _recognize(self, audio, timeout):
+        text, delay, confidence, error = self._next_entry()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise RecognitionTimeout(f"{self.name} did not answer within {timeout}s")
+        time.sleep(delay)
+        return self._result(text, confidence, error)
+
+    async def recognize_async(self, audio, timeout=None):
+        import asyncio
+
+        timeout = timeout if timeout is not None else self.timeout
+        start = time.perf_counter()
+        text, delay, confidence, error = self._next_entry()
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise RecognitionTimeout(f"{self.name} did not answer within {timeout}s")
+        await asyncio.sleep(delay)
+        text, confidence = self._result(text, confidence, error)
+        return RecognitionResult(text, confidence, self.name, time.perf_counter() - start)
+
+class ScriptedStreamingBackend(ScriptedBackend):
+    """
+    Scripted stand-in for a streaming recognizer.
+
+    Each transcript is emitted word by word as partial hypotheses, one every
+    `word_delay` seconds as if the words were being spoken, followed by the
+    final result after `delay` (the recognizer's end-of-speech wait). A dict
+    entry may give its own "partials" list; errors and None entries fail only
+    when the final result is due.
+    """
+    name = "scripted-streaming"
+    native_async = False
+    streaming = True
+
+    def __init__(self, script, word_delay=0.1, delay=0.3, confidence=1.0, repeat=False, timeout=None):
+        super().__init__(script, delay=delay, confidence=confidence, repeat=repeat, timeout=timeout)
+        self.word_delay = word_delay
+
+    def _next_stream_entry(self):
+        with self._lock:
+            try:
+                entry = next(self._entries)
+            except StopIteration:
+                raise SpeechNotUnderstood("script exhausted")
+
+        if not isinstance(entry, dict):
+            entry = {"text": entry}
+        text = entry.get("text")
+        words = text.split() if text else []
+        partials = entry.get("partials", [" ".join(words[:count]) for count in range(1, len(words) + 1)])
+        return (text, partials, entry.get("delay", self.delay),
+                entry.get("confidence", self.confidence), entry.get("error"))
+
+    def stream(self, audio, timeout=None):
+        start = time.perf_counter()
+        text, partials, delay, confidence, error = self._next_stream_entry()
+        for partial in partials:
+            time.sleep(self.word_delay)
+            yield PartialResult(partial, False, None)
+        time.sleep(delay)
+        text, confidence = self._result(text, confidence, error)
+        yield PartialResult(text, True, RecognitionResult(text, confidence, self.name, time.perf_counter() - start))
+
+    def recognize(self, audio, timeout=None):
+        for partial in self.stream(audio, timeout):
+            if partial.final:
+                return partial.result
+
+    recognize_async = RecognizerBackend.recognize_async
+
+class ConsoleBackend(RecognizerBackend):
+    """
+    Reads typed commands from standard input instead of recognizing speech.
+
+    Used by headless (text-only) assistants. End of input is reported as
+    "exit" so the assistant stops the same way it does for the spoken command.
+    """
+    name = "console"
+    requires_audio = False
+
+    def __init__(self, prompt="You: ", timeout=None):
+        super().__init__(timeout)
+        self.prompt = prompt
+
+    def _recognize(self, audio, timeout):
+        try:
+            text = input(self.prompt)
+        except EOFError:
+            return "exit", 1.0
+        if not text.strip():
+            raise SpeechNotUnderstood("empty input")
+        return text, 1.0
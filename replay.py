@@ -0,0 +1,194 @@
+"""
+Offline transcript replay for the command dispatcher.
+
+Streams transcripts through VoiceAssistant.process_command with a headless
+assistant (no microphone, speech engine or network) and reports throughput,
+per-handler and per-tier hit counts, the unmatched rate, latency percentiles
+and, when transcripts carry an expected answer, accuracy. A run can be saved
+as a baseline and later runs fail when they regress against it.
+
+Input is plain text (one transcript per line, # starts a comment) or JSONL
+with one {"text": ..., "expected": handler, intent or null} object per line.
+
+    python replay.py benchmarks/transcripts.jsonl --repeat 50
+    python replay.py benchmarks/transcripts.jsonl --save-baseline replay_baseline.json
+    python replay.py benchmarks/transcripts.jsonl --baseline replay_baseline.json
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from collections import Counter
+
+# Report fields compared against a baseline, and which direction is worse
+HIGHER_IS_BETTER = ("utterances_per_second", "accuracy")
+LOWER_IS_BETTER = ("p95_ms", "unmatched_rate")
+
+def load_transcripts(path):
+    """
+    Read (text, expected) pairs from a text or JSONL file; expected is None when not given
+    """
+    transcripts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON ({e})")
+                transcripts.append((entry["text"], entry.get("expected", ...)))
+            else:
+                transcripts.append((line, ...))
+    return transcripts
+
+def action_label(action):
+    """
+    Name a matched action by its handler ID, or by intent for response-only commands
+    """
+    return action.handler or f"{action.intent} (response)"
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def replay(assistant, transcripts, repeat=1):
+    """
+    Dispatch every transcript `repeat` times and return a report dict
+    """
+    handlers = Counter()
+    tiers = Counter()
+    latencies = []
+    unmatched = 0
+    checked = 0
+    correct = 0
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, expected in transcripts:
+            turn_start = time.perf_counter()
+            assistant.process_command(text.lower())
+            latencies.append(time.perf_counter() - turn_start)
+
+            resolution = assistant.last_resolution
+            if resolution is None:
+                unmatched += 1
+                label = None
+            else:
+                tier, action = resolution
+                tiers[tier] += 1
+                label = action_label(action)
+                handlers[label] += 1
+
+            # Expected answers may name the handler or the intent; null means "no command"
+            if expected is not ...:
+                checked += 1
+                if resolution is None:
+                    correct += expected is None
+                else:
+                    # Response-only actions have no handler; that is not a match for null
+                    correct += expected is not None and expected in (action.handler, action.intent)
+    elapsed = time.perf_counter() - start
+    # Replayed "stop" commands must not leave the assistant stopped
+    assistant.is_active = True
+
+    latencies.sort()
+    total = len(latencies)
+    return {
+        "utterances": total,
+        "seconds": round(elapsed, 4),
+        "utterances_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "unmatched_rate": round(unmatched / total, 4) if total else 0.0,
+        "accuracy": round(correct / checked, 4) if checked else None,
+        "tiers": dict(tiers.most_common()),
+        "handlers": dict(handlers.most_common()),
+    }
+
+def check_baseline(report, baseline, tolerance=0.2):
+    """
+    Describe every metric that regressed beyond the tolerance; an empty list means the run passes
+
+    Throughput and latency are relative (tolerance is a fraction of the baseline);
+    unmatched rate and accuracy may move by at most one percentage point.
+    """
+    regressions = []
+    for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+        old, new = baseline.get(key), report.get(key)
+        if old is None or new is None:
+            continue
+        if key.endswith("_rate") or key == "accuracy":
+            slack = 0.01
+        else:
+            slack = abs(old) * tolerance
+        worse = new < old - slack if key in HIGHER_IS_BETTER else new > old + slack
+        if worse:
+            regressions.append(f"{key}: {new} vs baseline {old}")
+    return regressions
+
+def print_report(report):
+    print(f"{report['utterances']} utterances in {report['seconds']:.3f}s "
+          f"({report['utterances_per_second']:.0f} utterances/s)")
+    print(f"latency p50 {report['p50_ms']:.3f} ms, p95 {report['p95_ms']:.3f} ms, p99 {report['p99_ms']:.3f} ms")
+    print(f"unmatched rate {report['unmatched_rate']:.1%}")
+    if report["accuracy"] is not None:
+        print(f"accuracy {report['accuracy']:.1%}")
+    print("tiers: " + ", ".join(f"{tier} {count}" for tier, count in report["tiers"].items()))
+    print("handlers:")
+    for label, count in report["handlers"].items():
+        print(f"  {count:>8}  {label}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay transcripts through the command dispatcher.")
+    parser.add_argument("transcripts", help="text file (one per line) or JSONL file")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the file this many times")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed passes before measuring")
+    parser.add_argument("--baseline", help="fail if the run regresses against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--save-baseline", help="write this run's report as a baseline JSON")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from v_assis import VoiceAssistant
+
+    transcripts = load_transcripts(args.transcripts)
+    if not transcripts:
+        print(f"No transcripts in {args.transcripts}")
+        return 2
+
+    # Keep stdout clean for --json output
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        assistant = VoiceAssistant("Vira", headless=True)
+    if args.warmup:
+        # Builds the lazily constructed tiers so they are not timed
+        replay(assistant, transcripts, args.warmup)
+    report = replay(assistant, transcripts, args.repeat)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = check_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressed against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
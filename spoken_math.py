@@ -0,0 +1,326 @@
+"""
+Spoken arithmetic: "two hundred and five divided by five", "7 squared",
+"square root of 16 plus 3".
+
+Text is tokenized in one pass into numbers and operators, with number words
+folded into values as they are read. The token sequence, with every number
+replaced by a placeholder, is the expression's shape. Shapes are parsed
+into a small AST once and memoized, so "2 plus 2" and "40 plus 2" share a
+parse. The AST is evaluated by a whitelist of operations; nothing is ever
+passed to eval(). Words after the expression that are not part of it
+("two plus two please") are trimmed before it is read.
+"""
+import math
+import re
+from functools import lru_cache
+
+UNITS = {word: value for value, word in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+    "fifteen sixteen seventeen eighteen nineteen".split())}
+UNITS["oh"] = 0
+TENS = {word: 10 * value for value, word in enumerate(
+    "twenty thirty forty fifty sixty seventy eighty ninety".split(), 2)}
+SCALES = {"thousand": 10 ** 3, "million": 10 ** 6, "billion": 10 ** 9}
+
+# Operator phrases (longest first wins) and the token each becomes
+OPERATORS = {
+    "plus": "+", "add": "+", "+": "+",
+    "minus": "-", "subtract": "-", "-": "-", "negative": "neg",
+    "times": "*", "multiplied by": "*", "x": "*", "*": "*",
+    "divided by": "/", "over": "/", "/": "/",
+    "mod": "%", "modulo": "%",
+    "to the power of": "^", "raised to the power of": "^", "raised to": "^", "power": "^", "^": "^",
+    "squared": "sq", "cubed": "cube",
+    "square root of": "sqrt", "the square root of": "sqrt", "root of": "sqrt", "sqrt": "sqrt",
+}
+MAX_OPERATOR_WORDS = max(len(phrase.split()) for phrase in OPERATORS)
+# Words dropped anywhere in an expression
+FILLERS = {"equals", "equal", "is"}
+
+# Digits, words and single-character operators; "2+2" splits into three tokens
+TOKEN = re.compile(r"\d+(?:\.\d+)?|[a-z]+|[+\-*/^]")
+
+# Largest exponent and magnitude an expression may reach
+MAX_EXPONENT = 1000
+MAX_MAGNITUDE = 1e100
+# Longest digit string read as a number; anything longer is past MAX_MAGNITUDE, and
+# int() refuses to convert very long strings at all
+MAX_DIGITS = 120
+# Most numbers and operators in one expression; the parser and evaluator recurse once
+# per operator, so a longer one would end in RecursionError instead of MathError
+MAX_TOKENS = 200
+
+class MathError(ValueError):
+    """The text is not an expression, or it cannot be evaluated"""
+
+def vocabulary():
+    """
+    Every word the tokenizer understands, e.g. for spelling correction
+    """
+    words = set(UNITS) | set(TENS) | set(SCALES) | FILLERS | {"hundred", "point", "and"}
+    for phrase in OPERATORS:
+        words.update(word for word in phrase.split() if word.isalpha())
+    return words
+
+VOCABULARY = frozenset(vocabulary())
+
+def _understood(word):
+    """
+    True if a whitespace-separated word has a token the tokenizer reads
+    """
+    return any(token[0].isdigit() or token in VOCABULARY or token in OPERATORS
+               for token in TOKEN.findall(word.lower().replace(",", "")))
+
+def trim(text):
+    """
+    Drop trailing words that are not part of an expression ("2 plus 2 please" -> "2 plus 2")
+
+    Text with no word the tokenizer understands is returned as is.
+    """
+    words = text.split()
+    end = len(words)
+    while end and not _understood(words[end - 1]):
+        end -= 1
+    if end == 0 or end == len(words):
+        return text
+    return " ".join(words[:end])
+
+def _continues_number(group, value):
+    """
+    True if a number word extends the number read so far ("twenty" + "three")
+    rather than starting a new one ("two" + "three")
+    """
+    last = group % 100
+    return last == 0 or (value < 10 and last >= 20 and last % 10 == 0)
+
+def tokenize(text):
+    """
+    Return (shape, values): operator tokens with "#" for each number, and the numbers in order
+    """
+    words = TOKEN.findall(text.lower().replace(",", ""))
+    shape = []
+    values = []
+    number = None       # value of the number being read, if any
+    group = 0           # part of it below the last thousand/million
+    decimals = None     # digits after "point"
+    i = 0
+
+    def finish():
+        nonlocal number, group, decimals
+        if number is not None:
+            value = number + group
+            if decimals:
+                value += float("0." + "".join(decimals))
+            shape.append("#")
+            values.append(value)
+        number, group, decimals = None, 0, None
+
+    while i < len(words):
+        if len(shape) > MAX_TOKENS:
+            raise MathError("That expression is too long")
+        word = words[i]
+        # Multi-word operators, longest first
+        for size in range(min(MAX_OPERATOR_WORDS, len(words) - i), 0, -1):
+            phrase = " ".join(words[i:i + size])
+            # "x" is only "times" right after a number
+            if phrase in OPERATORS and not (phrase == "x" and number is None and shape[-1:] != ["#"]):
+                finish()
+                shape.append(OPERATORS[phrase])
+                i += size
+                break
+        else:
+            if word[0].isdigit():
+                if len(word) > MAX_DIGITS:
+                    raise MathError("That number is too large")
+                finish()
+                shape.append("#")
+                values.append(float(word) if "." in word else int(word))
+            elif decimals is not None and word in UNITS and UNITS[word] < 10:
+                decimals.append(str(UNITS[word]))
+            elif word in UNITS or word in TENS:
+                value = UNITS.get(word, TENS.get(word))
+                if number is None:
+                    number = 0
+                elif decimals is not None or not _continues_number(group, value):
+                    finish()
+                    number = 0
+                group += value
+            elif word == "hundred" and number is not None and decimals is None:
+                group = (group or 1) * 100
+            elif word in SCALES and number is not None and decimals is None:
+                number += (group or 1) * SCALES[word]
+                group = 0
+            elif word == "point" and number is not None and decimals is None:
+                decimals = []
+            elif word == "and" and number is not None and i + 1 < len(words) and (
+                    words[i + 1] in UNITS or words[i + 1] in TENS):
+                pass
+            elif word in FILLERS:
+                finish()
+            else:
+                raise MathError(f"'{word}' is not part of an arithmetic expression")
+            i += 1
+    finish()
+    return tuple(shape), values
+
+@lru_cache(maxsize=512)
+def parse_shape(shape):
+    """
+    AST for a token shape; numbers are ("#", index) leaves into the values list
+
+    Precedence, loosest first: + -, then * / %, then unary minus and square
+    root, then ^ (right-associative), then "squared" and "cubed".
+    """
+    tokens = list(shape)
+    position = 0
+    index = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def expression():
+        node = term()
+        while peek() in ("+", "-"):
+            node = (take(), node, term())
+        return node
+
+    def term():
+        node = unary()
+        while peek() in ("*", "/", "%"):
+            node = (take(), node, unary())
+        return node
+
+    def unary():
+        if peek() in ("-", "neg"):
+            take()
+            return ("neg", unary())
+        if peek() == "sqrt":
+            take()
+            return ("sqrt", unary())
+        return power()
+
+    def power():
+        node = postfix()
+        if peek() == "^":
+            take()
+            return ("^", node, unary())
+        return node
+
+    def postfix():
+        nonlocal index
+        if peek() != "#":
+            raise MathError("expected a number")
+        take()
+        node = ("#", index)
+        index += 1
+        while peek() in ("sq", "cube"):
+            node = ("^", node, ("const", 2 if take() == "sq" else 3))
+        return node
+
+    node = expression()
+    if position != len(tokens):
+        raise MathError(f"unexpected '{tokens[position]}'")
+    return node
+
+def evaluate_node(node, values):
+    """
+    Evaluate an AST from parse_shape() with the expression's numbers
+    """
+    kind = node[0]
+    if kind == "#":
+        return values[node[1]]
+    if kind == "const":
+        return node[1]
+    if kind == "neg":
+        return -evaluate_node(node[1], values)
+    if kind == "sqrt":
+        value = evaluate_node(node[1], values)
+        if value < 0:
+            raise MathError("I can't take the square root of a negative number")
+        root = math.isqrt(value) if isinstance(value, int) else None
+        return root if root is not None and root * root == value else math.sqrt(value)
+
+    left = evaluate_node(node[1], values)
+    right = evaluate_node(node[2], values)
+    if kind == "+":
+        result = left + right
+    elif kind == "-":
+        result = left - right
+    elif kind == "*":
+        result = left * right
+    elif kind in ("/", "%"):
+        if right == 0:
+            raise MathError("I can't divide by zero")
+        if kind == "%":
+            result = left % right
+        else:
+            result = left // right if isinstance(left, int) and isinstance(right, int) and left % right == 0 \
+                else left / right
+    else:
+        if abs(right) > MAX_EXPONENT:
+            raise MathError("That exponent is too large")
+        if left == 0 and right < 0:
+            raise MathError("I can't divide by zero")
+        try:
+            result = left ** right if not (isinstance(right, int) and right < 0) else left ** float(right)
+        except OverflowError:
+            raise MathError("That number is too large")
+        if isinstance(result, complex):
+            raise MathError("That has no real answer")
+    if abs(result) > MAX_MAGNITUDE:
+        raise MathError("That number is too large")
+    return result
+
+def parse(text):
+    """
+    Return (ast, values) for a spoken expression; it must contain at least one operator
+    """
+    shape, values = tokenize(trim(text))
+    if not values or len(shape) == len(values):
+        raise MathError("not an arithmetic expression")
+    return parse_shape(shape), values
+
+def is_expression(text):
+    """
+    True if the text parses as an arithmetic expression (a grammar capture validator)
+    """
+    try:
+        parse(text)
+    except MathError:
+        return False
+    return True
+
+def is_expression_prefix(text):
+    """
+    True if more words could still turn the text into an expression (every word so far is understood)
+
+    Unlike parse(), trailing words are not trimmed: a partial transcript ending in
+    words outside the expression cannot be extended into one.
+    """
+    try:
+        tokenize(text)
+    except MathError:
+        return False
+    return True
+
+def evaluate(text):
+    """
+    Value of a spoken arithmetic expression; raises MathError
+    """
+    node, values = parse(text)
+    return evaluate_node(node, values)
+
+def format_number(value):
+    """
+    Render a result the way it would be said: integers as is, otherwise up to six decimals
+    """
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return f"{value:.6f}".rstrip("0").rstrip(".")
+    return str(value)
@@ -0,0 +1,58 @@
+import pytest
+
+from recognizer_backends import ScriptedStreamingBackend
+from v_assis import VoiceAssistant
+
+@pytest.fixture(scope="module")
+def grammar():
+    return VoiceAssistant("Vira", headless=True).grammar
+
+def streaming_assistant(script, early_dispatch=True):
+    backend = ScriptedStreamingBackend(script, word_delay=0, delay=0)
+    assistant = VoiceAssistant("Vira", recognizer_backend=backend, headless=True)
+    assistant.early_dispatch = early_dispatch
+    return assistant
+
+@pytest.mark.parametrize("partial", ["what time is it", "tell me a joke", "hello there", "thank you"])
+def test_complete_command_is_final(grammar, partial):
+    assert grammar.match_partial(partial) is not None
+
+@pytest.mark.parametrize("partial", ["what time", "tell me a", "hello", "calculate 2 plus", "calculate 2 plus 2"])
+def test_partial_that_may_continue_is_not_final(grammar, partial):
+    # "hello" may become "hello there", and an expression may get more terms
+    assert grammar.match_partial(partial) is None
+    assert grammar.can_extend(partial)
+
+def test_match_must_end_the_partial(grammar):
+    assert grammar.match_partial("what time is it now") is None
+    assert not grammar.can_extend("tell me a joke")
+
+def test_early_commit_on_unambiguous_partial():
+    assistant = streaming_assistant(["what time is it now"])
+    assert assistant.recognize(None) == "what time is it"
+    assert assistant.streaming_stats == {"early": 1, "final": 0}
+
+def test_no_early_commit_while_a_longer_command_is_possible():
+    assistant = streaming_assistant(["hello"])
+    assert assistant.recognize(None) == "hello"
+    assert assistant.streaming_stats == {"early": 0, "final": 1}
+
+def test_partial_ending_in_other_words_is_not_an_expression_prefix(grammar):
+    assert not grammar.can_extend("calculate 2 plus please")
+    assert grammar.match_partial("calculate 2 plus please") is None
+
+def test_trailing_words_commit_with_the_whole_expression():
+    assistant = streaming_assistant(["calculate 2 plus 2 please"])
+    assert assistant.recognize(None) == "calculate 2 plus 2 please"
+    assert assistant.process_command("calculate 2 plus 2 please") == "2 plus 2 is 4"
+
+def test_early_dispatch_off_waits_for_the_final_result():
+    assistant = streaming_assistant(["what time is it now"], early_dispatch=False)
+    assert assistant.recognize(None) == "what time is it now"
+    assert assistant.streaming_stats == {"early": 0, "final": 0}
+
+def test_early_reply_matches_final_reply():
+    early = streaming_assistant(["tell me a joke please"])
+    text = early.recognize(None)
+    assert early.streaming_stats["early"] == 1
+    assert early.resolve_command(text)[1] == early.resolve_command("tell me a joke please")[1]
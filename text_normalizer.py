@@ -0,0 +1,103 @@
+"""
+Canonical form of a transcript, shared by every matching tier.
+
+Recognizers disagree on case, punctuation and contractions ("What's the
+time?", "what is the time"), and speakers add fillers ("um"). normalize()
+folds all of that in one pass over the words of the text: each distinct
+word is split by one precompiled regex into word, number and operator
+tokens (dropping other punctuation), expanded, interned and cached, so a
+repeated word costs one dictionary lookup. A translation table unifies
+apostrophes in non-ASCII text. The grammar normalizes its phrases the same
+way, so the exact, fuzzy and intent tiers all compare canonical tokens.
+"""
+import hashlib
+import re
+import sys
+from collections import namedtuple
+
+# Canonical text and its tokens; text is the tokens joined by single spaces
+NormalizedText = namedtuple("NormalizedText", ["text", "tokens"])
+
+# Curly quotes and backticks become plain apostrophes
+APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "ʼ": "'", "`": "'"})
+
+# Numbers ("2.5", "1,000"), words with inner apostrophes or hyphens ("what's",
+# "twenty-one"), other alphanumerics ("4th") and arithmetic operators
+TOKEN = re.compile(r"\d+(?:[.,]\d+)*(?![^\W_])|[^\W\d_]+(?:['\-][^\W\d_]+)*(?![^\W_])|[^\W_]+|[-+*/^]")
+
+# Whole-word contractions; elsewhere "'s" is a possessive and is kept
+CONTRACTIONS = {
+    "what's": "what is", "that's": "that is", "it's": "it is", "there's": "there is",
+    "here's": "here is", "who's": "who is", "how's": "how is", "where's": "where is",
+    "when's": "when is", "he's": "he is", "she's": "she is", "let's": "let us",
+    "won't": "will not", "can't": "can not", "shan't": "shall not", "ain't": "is not",
+    "i'm": "i am",
+    # Recognizers sometimes drop the apostrophe; only spellings that are not words themselves
+    "whats": "what is", "thats": "that is", "whos": "who is", "hows": "how is", "wheres": "where is",
+    "dont": "do not", "doesnt": "does not", "didnt": "did not", "isnt": "is not", "arent": "are not",
+    "youre": "you are", "im": "i am",
+}
+# Suffix contractions, tried in order
+SUFFIXES = (("n't", " not"), ("'re", " are"), ("'ve", " have"), ("'ll", " will"), ("'d", " would"))
+# Hesitation sounds dropped everywhere
+FILLERS = frozenset({"um", "umm", "uh", "uhh", "uhm", "er", "erm", "hmm", "mm", "ah"})
+
+# Word -> tuple of interned canonical tokens; bounded so odd input cannot grow it forever
+MAX_CACHED_TOKENS = 20000
+_expansions = {}
+
+def fingerprint():
+    """
+    Digest of the normalization tables, so compiled indexes are rebuilt when they change
+    """
+    digest = hashlib.sha256(TOKEN.pattern.encode())
+    for table in (sorted(CONTRACTIONS.items()), SUFFIXES, sorted(FILLERS)):
+        digest.update(repr(table).encode())
+    return digest.digest()
+
+def _expand_token(token):
+    """
+    Canonical tokens for one regex token: contractions spelled out, fillers dropped
+    """
+    if token in FILLERS:
+        return ()
+    if token in CONTRACTIONS:
+        return CONTRACTIONS[token].split()
+    if "'" in token:
+        for suffix, replacement in SUFFIXES:
+            if token.endswith(suffix) and len(token) > len(suffix):
+                return (token[:-len(suffix)] + replacement).split()
+    if "-" in token and token != "-":
+        return token.split("-")
+    return (token,)
+
+def _expand(word):
+    """
+    Interned canonical tokens of one whitespace-separated word ("what's", "time?", "5-3")
+    """
+    return tuple(sys.intern(canonical) for token in TOKEN.findall(word) for canonical in _expand_token(token))
+
+def normalize(text):
+    """
+    Return the NormalizedText of a transcript
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = text.translate(APOSTROPHES)
+    tokens = []
+    # Transcripts reuse a small vocabulary, so each distinct word is tokenized once
+    for word in text.split():
+        expansion = _expansions.get(word)
+        if expansion is None:
+            if len(_expansions) >= MAX_CACHED_TOKENS:
+                _expansions.clear()
+            expansion = _expansions[word] = _expand(word)
+        tokens.extend(expansion)
+    return NormalizedText(" ".join(tokens), tuple(tokens))
+
+def normalize_phrase(phrase):
+    """
+    Canonical text of a grammar phrase; {slot} references are kept as they are
+    """
+    words = (word if word.startswith("{") else normalize(word).text for word in phrase.split())
+    return " ".join(word for word in words if word)
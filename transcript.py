@@ -0,0 +1,118 @@
+import os
+import textwrap
+import time
+from collections import deque
+from itertools import islice
+
+class TranscriptBuffer:
+    """
+    Bounded transcript model behind the GUI's text widget.
+
+    Messages are kept in a capped ring of entries. take() returns everything
+    added since the last call as one string to insert, plus how many lines to
+    delete from the top of the widget. Lines are trimmed in chunks, whole
+    messages at a time, once the transcript grows `trim_lines` past
+    `max_lines`, so the widget is not edited on every message and never
+    grows without limit. With a log file set, every message is also appended
+    to a size-rotated log.
+    """
+    def __init__(self, max_lines=1000, trim_lines=200, log_file=None, max_log_bytes=1024 * 1024,
+                 log_backups=3):
+        self.max_lines = max_lines
+        self.trim_lines = trim_lines
+        self.log_file = log_file
+        self.max_log_bytes = max_log_bytes
+        self.log_backups = log_backups
+        self.lines = 0
+        # (text, line count) per message, oldest first
+        self._entries = deque()
+        # The newest `_pending` entries have not been handed to the widget yet
+        self._pending = 0
+        self._trim = 0
+        self._log = None
+
+    def append(self, message, speaker="You"):
+        """
+        Add a message; indented multi-line text (such as the help text) is dedented
+        """
+        text = f"{speaker}: {textwrap.dedent(message).strip()}\n\n"
+        lines = text.count("\n")
+        self._entries.append((text, lines))
+        self._pending += 1
+        self.lines += lines
+
+        if self.lines > self.max_lines + self.trim_lines:
+            self._trim_to(self.max_lines)
+        if self.log_file:
+            self._write_log(text)
+
+    def _trim_to(self, limit):
+        """
+        Drop the oldest whole messages until at most `limit` lines remain
+        """
+        while self.lines > limit and len(self._entries) > 1:
+            _, lines = self._entries.popleft()
+            self.lines -= lines
+            if len(self._entries) >= self._pending:
+                self._trim += lines
+            else:
+                # Never reached the widget; just forget it
+                self._pending -= 1
+
+    def take(self):
+        """
+        Return (text to insert, lines to delete from the top) and mark both as applied
+        """
+        start = len(self._entries) - self._pending
+        text = "".join(entry for entry, _ in islice(self._entries, start, None))
+        trim = self._trim
+        self._pending = 0
+        self._trim = 0
+        return text, trim
+
+    def text(self):
+        """
+        The retained transcript as a single string
+        """
+        return "".join(entry for entry, _ in self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _write_log(self, text):
+        """
+        Append a message to the log, rotating it once it passes max_log_bytes
+        """
+        try:
+            if self._log is None:
+                self._log = open(self.log_file, 'a', encoding='utf-8')
+            self._log.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {text}")
+            self._log.flush()
+            if self._log.tell() >= self.max_log_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"Could not write transcript log: {e}")
+            self.log_file = None
+
+    def _rotate(self):
+        """
+        Shift log -> log.1 -> log.2 ..., dropping the oldest backup
+        """
+        self._log.close()
+        self._log = None
+        for index in range(self.log_backups - 1, 0, -1):
+            older = f"{self.log_file}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.log_file}.{index + 1}")
+        if self.log_backups:
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+
+    def close(self):
+        """
+        Close the log file, if one is open
+        """
+        if self._log is not None:
+            self._log.close()
+            self._log = None
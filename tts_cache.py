@@ -0,0 +1,216 @@
+import hashlib
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+class SpeechCache:
+    """
+    Content-addressed on-disk cache of synthesized speech.
+
+    Each reply is rendered once to an audio file named after the hash of its
+    text, voice and rate, so a cached reply starts playing immediately instead
+    of waiting for synthesis. Files are evicted least recently used first once
+    the directory grows past `max_bytes`; the modification time of a file is
+    its last use, so the LRU order survives restarts. When no audio player is
+    available, callers fall back to live synthesis.
+    """
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # nsss (macOS) writes AIFF; the other pyttsx3 drivers write WAV
+        self.extension = ".aiff" if sys.platform == "darwin" else ".wav"
+        self.player = self._find_player()
+        self.stats = {"hits": 0, "misses": 0, "synthesized": 0, "evicted": 0}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._playing = None
+        self._stopped = threading.Event()
+        self._scan()
+
+    @staticmethod
+    def key(text, voice, rate):
+        """
+        Cache key for a reply rendered with a given voice and rate
+        """
+        return hashlib.sha256(f"{voice}\0{rate}\0{text}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def _scan(self):
+        """
+        Rebuild the LRU order from the files already on disk
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            names = [name for name in os.listdir(self.cache_dir) if name.endswith(self.extension)]
+        except OSError as e:
+            print(f"Could not open speech cache: {e}")
+            return
+
+        files = []
+        for name in names:
+            if ".tmp" in name:
+                # A render interrupted by a crash; never a cache entry
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+
+    def get(self, text, voice, rate):
+        """
+        Path of the cached audio for a reply, or None
+        """
+        key = self.key(text, voice, rate)
+        with self._lock:
+            if key not in self._entries:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+            return None
+        return path
+
+    def __contains__(self, entry):
+        text, voice, rate = entry
+        return self.key(text, voice, rate) in self._entries
+
+    def synthesize(self, engine, text, voice, rate):
+        """
+        Render a reply to the cache with a pyttsx3 engine (the caller holds the engine lock)
+        """
+        key = self.key(text, voice, rate)
+        path = self._path(key)
+        temp_file = f"{path}.tmp{self.extension}"
+        try:
+            engine.save_to_file(text, temp_file)
+            engine.runAndWait()
+            size = os.path.getsize(temp_file)
+            if not size:
+                raise OSError("engine produced an empty file")
+            os.replace(temp_file, path)
+        except Exception as e:
+            print(f"Could not cache speech: {e}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return None
+
+        with self._lock:
+            self._size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stats["synthesized"] += 1
+            self._evict(keep=key)
+        return path
+
+    def _evict(self, keep):
+        """
+        Drop least recently used files until the cache fits in max_bytes
+        """
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._size -= size
+            self.stats["evicted"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _find_player():
+        """
+        Pick the first available way to play an audio file
+        """
+        # Checked without importing it; play() imports it on first use
+        if importlib.util.find_spec("simpleaudio") is not None:
+            return "simpleaudio"
+        if sys.platform == "win32":
+            return "winsound"
+        for command in ("afplay", "aplay", "paplay"):
+            if shutil.which(command):
+                return command
+        return None
+
+    def play(self, path):
+        """
+        Play a cached file to completion; returns False if it could not be played
+        """
+        if self.player is None:
+            return False
+        self._stopped.clear()
+        try:
+            if self.player == "simpleaudio":
+                import simpleaudio
+                self._playing = simpleaudio.WaveObject.from_wave_file(path).play()
+                self._playing.wait_done()
+            elif self.player == "winsound":
+                import winsound
+                with wave.open(path, 'rb') as f:
+                    duration = f.getnframes() / float(f.getframerate())
+                winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+                self._playing = winsound
+                self._stopped.wait(duration)
+            else:
+                self._playing = subprocess.Popen([self.player, path], stdout=subprocess.DEVNULL,
+                                                 stderr=subprocess.DEVNULL)
+                self._playing.wait()
+        except Exception as e:
+            print(f"Error playing cached speech: {e}")
+            return self._stopped.is_set()
+        finally:
+            self._playing = None
+        return True
+
+    def stop(self):
+        """
+        Interrupt the file that is currently playing, if any
+        """
+        self._stopped.set()
+        playing = self._playing
+        if playing is None:
+            return
+        try:
+            if self.player == "winsound":
+                playing.PlaySound(None, 0)
+            elif self.player == "simpleaudio":
+                playing.stop()
+            else:
+                playing.terminate()
+        except Exception:
+            pass
+
+    def prewarm(self, engine, engine_lock, texts, voice, rate):
+        """
+        Synthesize any of the given replies that are not cached yet; returns the time spent
+        """
+        start = time.perf_counter()
+        for text in texts:
+            if (text, voice, rate) in self:
+                continue
+            with engine_lock:
+                self.synthesize(engine, text, voice, rate)
+        return time.perf_counter() - start
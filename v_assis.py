@@ -1,163 +1,178 @@
-import speech_recognition as sr
-import pyttsx3
 import datetime
 import random
 import os
-import json
-import re
+import queue
+import sys
 import time
-from threading import Thread
+from collections import OrderedDict
+from threading import Thread, Lock
+from audio_capture import MicrophoneStream
+from noise_calibration import NoiseCalibration
+from recognizer_backends import (GoogleBackend, ConsoleBackend, RecognitionResult, RecognitionTimeout,
+                                 SpeechNotUnderstood, BackendUnavailable)
+from command_registry import CommandRegistry, CommandAction
+from fuzzy_index import FuzzyIndex
+from intent_classifier import IntentClassifier
+from metrics import MetricsRegistry
+import spoken_math
+from text_normalizer import normalize
+from tts_cache import SpeechCache
+from transcript import TranscriptBuffer
+
+# speech_recognition, pyttsx3, asyncio and tkinter are imported on first use
+# so that importing this module and building a headless assistant stay fast
+
+# Command definitions ship next to this file; the compiled index is cached beside them
+DEFINITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "command_definitions.json")
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "command_index.bin")
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration_cache.json")
+SPEECH_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "speech_cache")
+WAKE_WORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wake_word.json")
+
+# How often the GUI applies queued updates, and the most it applies per tick
+UI_POLL_MS = 50
+UI_BATCH_SIZE = 200
+
+# Most of an utterance the keyword fallback lets be outside the command vocabulary;
+# among unfamiliar words a keyword is usually part of something else ("the time
+# machine is a great book"). Request words never count against it.
+KEYWORD_MAX_UNKNOWN = 0.25
+REQUEST_WORDS = frozenset({"please", "want", "wanna", "now", "kindly"})
+
+# Distinct replies remembered to spot a second use (see speak); older ones are forgotten first
+SPOKEN_HISTORY = 512
+
+# Per-turn stages timed into VoiceAssistant.metrics, in the order they run
+STAGES = ("calibration", "capture", "wake", "recognition", "matching", "handler", "tts")
 
 class VoiceAssistant:
-    def __init__(self, name="Assistant"):
+    def __init__(self, name="Assistant", recognizer_backend=None, headless=False):
         """
         Initialize the voice assistant with necessary components
+        
+        recognizer_backend defaults to Google Web Speech; pass a ScriptedBackend
+        (see recognizer_backends) to run without a microphone or network.
+        With headless=True the assistant is text-only: it reads commands from
+        standard input (unless given a backend) and prints its replies, and
+        never loads the audio stack. Otherwise the microphone and speech
+        engine are still only initialized when first used.
         """
         self.name = name
-        self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
+        self.headless = headless
+        self.recognizer_backend = recognizer_backend or (ConsoleBackend() if headless else GoogleBackend())
+        self.last_recognition = None
+        # With a streaming backend, stop recognizing once a partial is already a complete command
+        self.early_dispatch = True
+        self.streaming_stats = {"early": 0, "final": 0}
+        # (tier, CommandAction) that answered the last command, or None for the default reply
+        self.last_resolution = None
+        self._recognizer = None
+        self._engine = None
+        # pyttsx3 engines are not thread-safe; live speech and cache fills share this lock
+        self._engine_lock = Lock()
+        self._speech_cache = None
+        self._spoken = OrderedDict()
         self.is_active = False
         self.commands_file = "commands_database.json"
+        self.mic_stream = None
+        # Audio source for capture; None opens the default sr.Microphone (see audio_fixtures
+        # for ReplayMicrophone), and a FixtureRecorder saves every captured utterance
+        self.microphone = None
+        self.fixture_recorder = None
+        # Optional WakeWordDetector: when set, only speech after the wake phrase is recognized
+        self.wake_word = None
+        self.wake_window = 8.0
+        self._awake_until = 0.0
+        self.calibration = NoiseCalibration(CALIBRATION_FILE)
+        # Latency histograms for each stage of a turn (see STAGES)
+        self.metrics = MetricsRegistry()
+        self.handlers = self._build_handler_table()
+        self.welcome_message = f"Hello! I'm {self.name}, your voice assistant with over 5000 commands. How can I help you?"
+        
+        # Load the precompiled command index (rebuilt only when definitions change)
+        self.registry = CommandRegistry(DEFINITIONS_FILE, INDEX_FILE, user_commands_file=self.commands_file)
+        self.grammar = self.registry.load()
+        # "calculate {*expression}" only matches text that parses as arithmetic
+        self.grammar.add_capture("expression", spoken_math.is_expression, spoken_math.is_expression_prefix)
+        # Tolerates misrecognized words; its dictionary is built on first use
+        self.fuzzy_index = FuzzyIndex(self.grammar, extra_words=spoken_math.vocabulary())
+        # Nearest-intent guess for free-form phrasings; trained from the grammar on first use
+        self.intent_classifier = IntentClassifier(self.grammar)
+
+        print(f"{self.name} initialized with {self.grammar.count()} commands.")
         
-        # Configure voice properties
-        voices = self.engine.getProperty('voices')
-        # Set voice to female voice if available
-        if len(voices) > 1:
-            self.engine.setProperty('voice', voices[1].id)
-        self.engine.setProperty('rate', 175)  # Speed of speech
-        
-        # Initialize commands database
-        self.commands = self._load_commands()
-        self.extended_commands = self._generate_extended_commands()
-        
-        # Add both base commands and extended commands
-        self.all_commands = {**self.commands, **self.extended_commands}
-        
-        print(f"{self.name} initialized with {len(self.all_commands)} commands.")
-        
-    def _load_commands(self):
-        """
-        Load base commands or create default command set if file doesn't exist
-        """
-        base_commands = {
-            "hello": self._respond_hello,
-            "hi": self._respond_hello,
-            "hey": self._respond_hello,
-            "what is your name": lambda: f"My name is {self.name}. How can I help you?",
-            "what time is it": self._get_time,
-            "what day is it": self._get_date,
-            "tell me a joke": self._tell_joke,
-            "weather": lambda: "I don't have access to weather data yet, but I can be configured to check the forecast.",
-            "thank you": lambda: "You're welcome! Is there anything else I can help with?",
-            "stop listening": self.stop,
-            "exit": self.stop,
-            "help": self._provide_help,
-            "what can you do": self._provide_help
-        }
-        
-        if os.path.exists(self.commands_file):
-            try:
-                with open(self.commands_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading commands file: {e}")
-                return base_commands
-        else:
-            return base_commands
+    @property
+    def recognizer(self):
+        """
+        speech_recognition Recognizer used for capture, created on first use
+        """
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+    
+    @property
+    def engine(self):
+        """
+        Text-to-speech engine, initialized and configured on first use
+        """
+        if self._engine is None:
+            import pyttsx3
+            engine = pyttsx3.init()
             
-    def _generate_extended_commands(self):
-        """
-        Generate thousands of additional commands programmatically
-        """
-        extended_commands = {}
-        
-        # Time related commands
-        time_prefixes = ["what's", "tell me", "what is", "do you know", "can you tell me"]
-        time_suffixes = ["the time", "the current time", "what time it is", "the hour"]
-        
-        for prefix in time_prefixes:
-            for suffix in time_suffixes:
-                cmd = f"{prefix} {suffix}"
-                extended_commands[cmd] = self._get_time
-        
-        # Date related commands
-        date_prefixes = ["what's", "tell me", "what is", "do you know", "can you tell me"]
-        date_suffixes = ["the date", "today's date", "what day it is", "the day", "today"]
-        
-        for prefix in date_prefixes:
-            for suffix in date_suffixes:
-                cmd = f"{prefix} {suffix}"
-                extended_commands[cmd] = self._get_date
-        
-        # Joke related commands
-        joke_prefixes = ["tell", "say", "give", "share", "do you know"]
-        joke_objects = ["a joke", "something funny", "a funny joke", "a good joke", "something humorous"]
-        
-        for prefix in joke_prefixes:
-            for obj in joke_objects:
-                cmd = f"{prefix} me {obj}"
-                extended_commands[cmd] = self._tell_joke
-        
-        # Greeting variations
-        greetings = ["hello there", "good morning", "good afternoon", "good evening", 
-                     "hi there", "hey there", "greetings", "howdy", "what's up"]
-        
-        for greeting in greetings:
-            extended_commands[greeting] = self._respond_hello
-        
-        # System commands
-        system_commands = {
-            "turn off": self.stop,
-            "shutdown": self.stop,
-            "go to sleep": self.stop,
-            "end program": self.stop,
-            "stop program": self.stop,
-            "terminate": self.stop,
-        }
-        extended_commands.update(system_commands)
-        
-        # Help variations
-        help_commands = ["what commands", "show commands", "command list", "available commands", 
-                         "what can I say", "command help", "instructions", "how to use"]
-        
-        for cmd in help_commands:
-            extended_commands[cmd] = self._provide_help
-        
-        # Calculator commands
-        # These would be handled by a more advanced parser in a real application
-        calc_commands = ["calculate", "compute", "what is", "solve", "evaluate"]
-        calc_examples = ["2 plus 2", "5 minus 3", "4 times 6", "8 divided by 2", 
-                         "square root of 16", "7 squared"]
-        
-        for cmd in calc_commands:
-            for example in calc_examples:
-                extended_commands[f"{cmd} {example}"] = lambda: "Calculator functionality is available in the full version."
-        
-        # Music commands
-        music_commands = {
-            "play music": lambda: "Music playback is available in the full version.",
-            "play some music": lambda: "Music playback is available in the full version.",
-            "start music": lambda: "Music playback is available in the full version.",
-            "next song": lambda: "Music playback is available in the full version.",
-            "previous song": lambda: "Music playback is available in the full version.",
-            "pause music": lambda: "Music playback is available in the full version.",
-            "stop music": lambda: "Music playback is available in the full version."
-        }
-        extended_commands.update(music_commands)
-        
-        # Weather commands
-        weather_commands = {
-            "what's the weather": lambda: "Weather forecast is available in the full version.",
-            "tell me the weather": lambda: "Weather forecast is available in the full version.",
-            "weather forecast": lambda: "Weather forecast is available in the full version.",
-            "is it going to rain": lambda: "Weather forecast is available in the full version.",
-            "temperature outside": lambda: "Weather forecast is available in the full version."
+            # Configure voice properties
+            voices = engine.getProperty('voices')
+            # Set voice to female voice if available
+            if len(voices) > 1:
+                engine.setProperty('voice', voices[1].id)
+            engine.setProperty('rate', 175)  # Speed of speech
+            self.voice_id = engine.getProperty('voice')
+            self.speech_rate = engine.getProperty('rate')
+            self._engine = engine
+        return self._engine
+    
+    @property
+    def speech_cache(self):
+        """
+        On-disk cache of synthesized replies, opened on first use
+        """
+        if self._speech_cache is None:
+            self._speech_cache = SpeechCache(SPEECH_CACHE_DIR)
+        return self._speech_cache
+    
+    def _build_handler_table(self):
+        """
+        Map handler IDs used in the command definitions to bound methods
+        """
+        return {
+            "respond_hello": self._respond_hello,
+            "get_time": self._get_time,
+            "get_date": self._get_date,
+            "tell_joke": self._tell_joke,
+            "provide_help": self._provide_help,
+            "stop": self.stop,
+            "calculate": self._calculate,
         }
-        extended_commands.update(weather_commands)
-        
-        # And many more categories could be added...
+    
+    def _run_action(self, action, handlers=None, argument=None):
+        """
+        Execute a matched command: call its handler or render its response template
         
-        return extended_commands
+        argument is the text a rule's capture slot took, passed to the handler.
+        """
+        if action.handler:
+            handler = (handlers or self.handlers).get(action.handler)
+            if handler is None:
+                print(f"Unknown handler ID '{action.handler}' for intent '{action.intent}'")
+                return None
+            return handler(argument) if argument is not None else handler()
+        return action.response.replace("{name}", self.name)
+    
+    def export_commands(self):
+        """
+        Expand the grammar into a flat {phrase: action} table for inspection
+        """
+        return self.grammar.expand()
     
     def _respond_hello(self):
         """
@@ -203,6 +218,18 @@ class VoiceAssistant:
         ]
         return random.choice(jokes)
     
+    def _calculate(self, expression=None):
+        """
+        Evaluate a spoken arithmetic expression ("two plus two", "square root of 16")
+        """
+        if expression is None:
+            return None
+        expression = spoken_math.trim(expression)
+        try:
+            return f"{expression} is {spoken_math.format_number(spoken_math.evaluate(expression))}"
+        except spoken_math.MathError as e:
+            return f"{e}."
+    
     def _provide_help(self):
         """
         Provide help information about available commands
@@ -225,71 +252,357 @@ class VoiceAssistant:
     
     def speak(self, text):
         """
-        Convert text to speech
+        Convert text to speech, playing a cached rendering when there is one
         """
         print(f"{self.name}: {text}")
-        self.engine.say(text)
-        self.engine.runAndWait()
+        if self.headless:
+            return
+        
+        engine = self.engine
+        with self.metrics.span("tts"):
+            path = self.speech_cache.get(text, self.voice_id, self.speech_rate)
+            if path and self.speech_cache.play(path):
+                return
+            
+            with self._engine_lock:
+                engine.say(text)
+                engine.runAndWait()
+        
+        # Cache replies on their second use (jokes, greetings), not one-off ones like the time
+        if text in self._spoken:
+            self._spoken.move_to_end(text)
+            if self.speech_cache.player:
+                Thread(target=self._cache_reply, args=(text,), daemon=True).start()
+        else:
+            # Every time-of-day reply is new; keep only the most recent ones
+            self._spoken[text] = None
+            if len(self._spoken) > SPOKEN_HISTORY:
+                self._spoken.popitem(last=False)
     
-    def listen(self):
+    def _cache_reply(self, text):
+        with self._engine_lock:
+            self.speech_cache.synthesize(self.engine, text, self.voice_id, self.speech_rate)
+    
+    def static_replies(self):
         """
-        Listen for voice commands using the microphone
+        Replies that never change: the welcome banner, help text and fixed command responses
         """
-        try:
-            with sr.Microphone() as source:
-                print("Listening...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.listen(source, timeout=5)
-                
-                print("Processing speech...")
-                text = self.recognizer.recognize_google(audio).lower()
-                print(f"You said: {text}")
-                return text
-                
-        except sr.WaitTimeoutError:
-            print("Timeout - no speech detected")
+        replies = [self.welcome_message, self._provide_help(),
+                   "Stopping the voice assistant. Goodbye!", "I didn't catch that. Could you repeat?",
+                   "I'm not sure how to respond to that. Say 'help' for a list of commands."]
+        for rule in self.grammar.rules:
+            if rule.handler.response:
+                replies.append(self._run_action(rule.handler))
+        return list(dict.fromkeys(replies))
+    
+    def prewarm_speech(self):
+        """
+        Render the static replies into the speech cache on a background thread
+        """
+        if self.headless or not self.speech_cache.player:
             return None
-        except sr.UnknownValueError:
-            print("Could not understand audio")
+        
+        # Initialize the engine here rather than racing the first speak() for it
+        engine = self.engine
+
+        def prewarm():
+            spent = self.speech_cache.prewarm(engine, self._engine_lock, self.static_replies(),
+                                              self.voice_id, self.speech_rate)
+            if self.speech_cache.stats["synthesized"]:
+                print(f"Speech cache pre-warmed in {spent:.1f}s")
+        
+        thread = Thread(target=prewarm, daemon=True)
+        thread.start()
+        return thread
+    
+    def stop_speaking(self):
+        """
+        Interrupt any utterance that is currently playing
+        """
+        if self._speech_cache is not None:
+            self._speech_cache.stop()
+        if self._engine is not None:
+            self._engine.stop()
+    
+    def open_microphone_stream(self, **options):
+        """
+        Keep the microphone open and segment utterances continuously (see MicrophoneStream)
+        """
+        if self.mic_stream is None:
+            microphone = options.pop("microphone", None) or self.microphone
+            if microphone is None:
+                import speech_recognition as sr
+                microphone = sr.Microphone()
+            cached = self.calibration.threshold_for(self.calibration.device_key(microphone))
+            options.setdefault("energy_threshold", cached or self.recognizer.energy_threshold)
+            self.mic_stream = MicrophoneStream(microphone=microphone, **options).start()
+        return self.mic_stream
+    
+    def close_microphone_stream(self):
+        """
+        Release the persistent microphone stream, if one is open
+        """
+        if self.mic_stream is not None:
+            # Remember the level the segmenter adapted to for the next session
+            device = self.calibration.device_key(self.mic_stream.microphone)
+            self.calibration.store(device, self.mic_stream.segmenter.energy_threshold)
+            self.calibration.save()
+            self.mic_stream.stop()
+            self.mic_stream = None
+    
+    def capture(self):
+        """
+        Capture a single utterance from the microphone
+        """
+        if not self.recognizer_backend.requires_audio:
+            # Stand-in backends script their own transcripts; nothing to record
             return None
-        except sr.RequestError as e:
-            print(f"Could not request results; {e}")
+        
+        if self.mic_stream is not None:
+            print("Listening...")
+            with self.metrics.span("capture"):
+                return self.mic_stream.get_utterance(timeout=5)
+        
+        microphone = self.microphone
+        if microphone is None:
+            import speech_recognition as sr
+            microphone = sr.Microphone()
+        
+        with microphone as source:
+            print("Listening...")
+            # Calibrates only on first use of the device; see NoiseCalibration
+            with self.metrics.span("calibration"):
+                self.calibration.calibrate(self.recognizer, source)
+            with self.metrics.span("capture"):
+                audio = self.recognizer.listen(source, timeout=5)
+            self.calibration.observe(self.recognizer, source, audio)
+            return audio
+    
+    def enable_hedging(self, *backends, **options):
+        """
+        Race slow recognitions against fallback backends (or a retry)
+        
+        With no extra backends, a recognition slower than the observed p95 is
+        retried on the same backend; options are passed to HedgedBackend.
+        """
+        from hedged_recognition import HedgedBackend
+        
+        self.recognizer_backend = HedgedBackend([self.recognizer_backend, *backends], **options)
+        return self.recognizer_backend
+    
+    def enable_wake_word(self, templates_file=WAKE_WORD_FILE, window_seconds=8.0, **options):
+        """
+        Only send speech to the recognizer after the wake phrase
+        
+        The phrase may start the command itself ("Vira, what time is it") or
+        come alone, in which case the next utterance within window_seconds is
+        recognized. Templates are recorded with `python wake_word.py enroll`;
+        options are passed to WakeWordDetector.
+        """
+        from wake_word import WakeWordDetector
+        
+        self.wake_word = WakeWordDetector.load(templates_file, **options)
+        self.wake_window = window_seconds
+        return self.wake_word
+    
+    def _wake_gate(self, audio):
+        """
+        Audio to recognize, or None while the assistant is waiting for its wake phrase
+        """
+        if time.monotonic() < self._awake_until:
+            # One command per wake phrase
+            self._awake_until = 0.0
+            return audio
+        
+        with self.metrics.span("wake"):
+            detection = self.wake_word.detect(audio)
+        if detection is None:
             return None
+        if detection.command_audio is not None:
+            return detection.command_audio
+        
+        print("Wake word detected")
+        self._awake_until = time.monotonic() + self.wake_window
+        return None
+    
+    def recognize(self, audio):
+        """
+        Convert captured audio to lower-case text
+        
+        Returns None without recognizing when a wake word is required and was not heard.
+        """
+        if self.wake_word is not None and audio is not None:
+            audio = self._wake_gate(audio)
+            if audio is None:
+                return None
+        
+        if not self.headless:
+            print("Processing speech...")
+        text = None
+        try:
+            with self.metrics.span("recognition"):
+                if self.early_dispatch and self.recognizer_backend.streaming:
+                    self.last_recognition = self._recognize_streaming(audio)
+                else:
+                    self.last_recognition = self.recognizer_backend.recognize(audio)
+            text = self.last_recognition.text.lower()
+        finally:
+            if self.fixture_recorder is not None and audio is not None:
+                self.fixture_recorder.save(audio, text)
+        if not self.headless:
+            print(f"You said: {text}")
+        return text
+    
+    def _recognize_streaming(self, audio):
+        """
+        Follow a streaming backend's partial hypotheses, returning early at one that
+        is already an unambiguous command (see CommandGrammar.match_partial)
+        """
+        backend = self.recognizer_backend
+        start = time.perf_counter()
+        stream = backend.stream(audio)
+        try:
+            for partial in stream:
+                if partial.final:
+                    self.streaming_stats["final"] += 1
+                    return partial.result
+                if self.grammar.match_partial(partial.text) is not None:
+                    self.streaming_stats["early"] += 1
+                    return RecognitionResult(partial.text, None, backend.name, time.perf_counter() - start)
+        finally:
+            # Abandons the rest of the recognition after an early commit
+            stream.close()
+        raise SpeechNotUnderstood(f"{backend.name} stream ended without a final result")
+    
+    def record_fixtures(self, fixture_dir):
+        """
+        Save every captured utterance and its transcript to a fixture directory
+        """
+        from audio_fixtures import FixtureRecorder
+        
+        self.fixture_recorder = FixtureRecorder(fixture_dir)
+        return self.fixture_recorder
+    
+    def listen(self):
+        """
+        Listen for voice commands using the microphone
+        """
+        try:
+            audio = self.capture()
+            return self.recognize(audio)
         except Exception as e:
-            print(f"Error in speech recognition: {e}")
+            self.report_listen_error(e)
             return None
     
+    def report_listen_error(self, error):
+        """
+        Print a short description of a capture or recognition failure
+        """
+        # speech_recognition errors can only come from the audio stack once it is loaded
+        sr = sys.modules.get("speech_recognition")
+        if sr is not None and isinstance(error, sr.WaitTimeoutError):
+            print("Timeout - no speech detected")
+        elif isinstance(error, SpeechNotUnderstood) or (sr is not None and isinstance(error, sr.UnknownValueError)):
+            print("Could not understand audio")
+        elif isinstance(error, RecognitionTimeout):
+            print(f"Recognition timed out; {error}")
+        elif isinstance(error, BackendUnavailable) or (sr is not None and isinstance(error, sr.RequestError)):
+            print(f"Could not request results; {error}")
+        else:
+            print(f"Error in speech recognition: {error}")
+    
     def process_command(self, command_text):
         """
         Process the voice command and return a response
         """
+        response, self.last_resolution = self.resolve_command(command_text)
+        return response
+    
+    def resolve_command(self, command_text, handlers=None):
+        """
+        Return (response, (tier, action) or None) for a command
+        
+        The resolution is returned rather than stored, and `handlers` can
+        replace the handler table, so one assistant can answer for several
+        sessions (see assistant_server) as long as stateful handlers such as
+        "stop" are bound to the session.
+        """
         if not command_text:
-            return "I didn't catch that. Could you repeat?"
+            return "I didn't catch that. Could you repeat?", None
         
-        # Check for exact commands
-        for command, handler in self.all_commands.items():
-            if command in command_text:
-                if callable(handler):
-                    return handler()
-                else:
-                    return handler
+        # Matching time is summed across tiers; handler time is timed separately
+        matching = 0.0
+        started = time.perf_counter()
+        try:
+            for tier, action, argument in self._candidate_actions(command_text):
+                matching += time.perf_counter() - started
+                with self.metrics.span("handler"):
+                    response = self._run_action(action, handlers, argument)
+                if response is not None:
+                    return response, (tier, action)
+                started = time.perf_counter()
+            matching += time.perf_counter() - started
+        finally:
+            self.metrics.observe("matching", matching)
         
+        # Default response if no command is recognized
+        return f"I'm not sure how to respond to that. Say 'help' for a list of commands.", None
+    
+    def _candidate_actions(self, command_text):
+        """
+        Yield (tier, action, captured text) from each matching tier in turn, most precise first
+        
+        The command is normalized once (case, punctuation, contractions, fillers)
+        and every tier reads the same canonical text and tokens.
+        """
+        utterance = normalize(command_text)
+        
+        # Check for exact commands (longest phrase wins, then priority)
+        match = self.grammar.match(utterance.text)
+        if match:
+            yield "exact", match.handler, match.capture
+        
+        # Then commands with a few misrecognized words ("tell me a joe")
+        fuzzy = self.fuzzy_index.match(utterance.text, utterance.tokens)
+        if fuzzy:
+            yield "fuzzy", fuzzy.match.handler, fuzzy.match.capture
+        
+        # Then the closest intent, if the utterance is similar enough to its phrases
+        intent = self.intent_classifier.classify(utterance.text)
+        if intent:
+            yield "intent", intent.action, None
+        
+        action = self._keyword_fallback(utterance.tokens)
+        if action:
+            yield "keyword", action, None
+    
+    def _keyword_fallback(self, tokens):
+        """
+        Last resort: pick an action on a lone keyword (whole words only, so "this" is not "hi")
+        """
         # Natural language understanding 
         # (A more sophisticated NLU system would be used in a real application)
-        if any(word in command_text for word in ["hello", "hi", "hey", "greetings"]):
-            return self._respond_hello()
+        if self.fuzzy_index.vocabulary is None:
+            self.fuzzy_index.build()
+        vocabulary = self.fuzzy_index.vocabulary
+        unknown = sum(token not in vocabulary and token not in REQUEST_WORDS for token in tokens)
+        if unknown > KEYWORD_MAX_UNKNOWN * len(tokens):
+            return None
+        words = set(tokens)
+        
+        if words & {"hello", "hi", "hey", "greetings"}:
+            return CommandAction("greeting", "respond_hello", None)
         
-        if any(phrase in command_text for phrase in ["time", "hour", "clock"]):
-            return self._get_time()
+        if words & {"time", "hour", "clock"}:
+            return CommandAction("time", "get_time", None)
             
-        if any(phrase in command_text for phrase in ["date", "day", "today"]):
-            return self._get_date()
+        if words & {"date", "day", "today"}:
+            return CommandAction("date", "get_date", None)
             
-        if any(phrase in command_text for phrase in ["joke", "funny"]):
-            return self._tell_joke()
+        if words & {"joke", "funny"}:
+            return CommandAction("joke", "tell_joke", None)
         
-        # Default response if no command is recognized
-        return f"I'm not sure how to respond to that. Say 'help' for a list of commands."
+        return None
     
     def stop(self):
         """
@@ -298,12 +611,51 @@ class VoiceAssistant:
         self.is_active = False
         return "Stopping the voice assistant. Goodbye!"
     
-    def start(self):
+    def start(self, pipelined=False, continuous_capture=False, metrics_file=None):
         """
         Start the voice assistant
+        
+        With pipelined=True capture, recognition and speech overlap (see AssistantPipeline);
+        with continuous_capture=True the microphone stays open between commands.
+        metrics_file receives the stage latencies on exit (Prometheus text for .prom, else JSON).
         """
         self.is_active = True
-        self.speak(f"Hello! I'm {self.name}, your voice assistant with over 5000 commands. How can I help you?")
+        welcome = self.welcome_message
+        
+        if continuous_capture and not self.headless:
+            self.open_microphone_stream()
+        self.prewarm_speech()
+        
+        try:
+            if pipelined:
+                import asyncio
+                from assistant_pipeline import AssistantPipeline
+                asyncio.run(AssistantPipeline(self).run(greeting=welcome))
+            else:
+                self._run_loop(welcome)
+        finally:
+            self.close_microphone_stream()
+            if self.wake_word is not None:
+                print(f"Wake word: {self.wake_word.stats}")
+            if self.streaming_stats["early"]:
+                print(f"Streaming recognition: {self.streaming_stats}")
+            if self.calibration.stats["turns"]:
+                print(f"Calibration latency report: {self.calibration.report()}")
+            if self._speech_cache is not None:
+                print(f"Speech cache: {self._speech_cache.stats}")
+            if self.metrics.histograms:
+                print(f"Stage latency (last turn): {self.metrics.readout(STAGES)}")
+            if metrics_file:
+                try:
+                    self.metrics.dump(metrics_file)
+                except OSError as e:
+                    print(f"Could not write metrics: {e}")
+    
+    def _run_loop(self, welcome):
+        """
+        Sequential listen -> process -> speak loop
+        """
+        self.speak(welcome)
         
         while self.is_active:
             command = self.listen()
@@ -321,12 +673,21 @@ class VoiceAssistant:
 class VoiceAssistantGUI:
     """
     A simple GUI for the voice assistant using Tkinter
+    
+    Only the Tk main thread touches widgets. The listener thread queues
+    recognized commands for a dispatch worker, which runs the command and
+    speaks the reply off the UI thread; both post transcript and status
+    updates to a queue that the UI drains on a timer, in batches.
     """
-    def __init__(self, root):
+    def __init__(self, root, transcript_log=None):
         try:
             import tkinter as tk
             from tkinter import scrolledtext, ttk
             
+            # Imported once here; the widget helpers below reuse these modules
+            self.tk = tk
+            self.ttk = ttk
+            self.scrolledtext = scrolledtext
             self.root = root
             self.root.title("Python Voice Assistant")
             self.root.geometry("600x500")
@@ -336,6 +697,15 @@ class VoiceAssistantGUI:
             self.assistant = VoiceAssistant("Vira")
             self.is_running = False
             self.listen_thread = None
+            self.commands = queue.Queue()
+            self.ui_updates = queue.Queue()
+            # Bounded model of the transcript widget; optionally logged to a rotating file
+            self.transcript_buffer = TranscriptBuffer(log_file=transcript_log)
+            # Status text and how many metric samples the status bar last showed
+            self._status = "Ready"
+            self._metrics_seen = 0
+            self.dispatch_thread = Thread(target=self._dispatch_loop, daemon=True)
+            self.dispatch_thread.start()
             
             # Create GUI components
             self._create_header()
@@ -356,6 +726,7 @@ class VoiceAssistantGUI:
             self.root.geometry(f"{width}x{height}+{x}+{y}")
             
             self.update_status("Ready")
+            self.root.after(UI_POLL_MS, self._drain_ui_updates)
         
         except ImportError:
             print("GUI requires Tkinter. Running in console mode instead.")
@@ -365,7 +736,7 @@ class VoiceAssistantGUI:
     def _create_header(self):
         """Create header with title and subtitle"""
         try:
-            import tkinter as tk
+            tk = self.tk
             
             header_frame = tk.Frame(self.root, bg="#f0f0f0")
             header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 0))
@@ -383,10 +754,9 @@ class VoiceAssistantGUI:
     def _create_transcript_area(self):
         """Create scrollable transcript area"""
         try:
-            import tkinter as tk
-            from tkinter import scrolledtext
+            tk = self.tk
             
-            self.transcript = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, 
+            self.transcript = self.scrolledtext.ScrolledText(self.root, wrap=tk.WORD, 
                                                        width=50, height=15,
                                                        font=("Arial", 10))
             self.transcript.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
@@ -397,8 +767,8 @@ class VoiceAssistantGUI:
     def _create_control_buttons(self):
         """Create control buttons"""
         try:
-            import tkinter as tk
-            from tkinter import ttk
+            tk = self.tk
+            ttk = self.ttk
             
             button_frame = tk.Frame(self.root, bg="#f0f0f0")
             button_frame.grid(row=2, column=0, sticky="ew", padx=20, pady=10)
@@ -422,7 +792,7 @@ class VoiceAssistantGUI:
     def _create_status_bar(self):
         """Create status bar"""
         try:
-            import tkinter as tk
+            tk = self.tk
             
             self.status_var = tk.StringVar()
             self.status_var.set("Ready")
@@ -434,24 +804,57 @@ class VoiceAssistantGUI:
             pass
     
     def update_transcript(self, message, speaker="You"):
-        """Add a message to the transcript area"""
-        try:
-            import tkinter as tk
-            
-            self.transcript.config(state=tk.NORMAL)
-            self.transcript.insert(tk.END, f"{speaker}: {message}\n\n")
-            self.transcript.see(tk.END)
-            self.transcript.config(state=tk.DISABLED)
-            self.root.update()
-        except:
-            print(f"{speaker}: {message}")
+        """Queue a message for the transcript area (safe from any thread)"""
+        self.ui_updates.put(("transcript", (message, speaker)))
     
     def update_status(self, status):
-        """Update the status bar text"""
+        """Queue a status bar update (safe from any thread)"""
+        self.ui_updates.put(("status", status))
+    
+    def _drain_ui_updates(self):
+        """Apply queued updates on the Tk main thread, batching transcript inserts"""
+        status = None
+        stopped = False
+        for _ in range(UI_BATCH_SIZE):
+            try:
+                kind, value = self.ui_updates.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "transcript":
+                self.transcript_buffer.append(*value)
+            elif kind == "status":
+                status = self._status = value
+            elif kind == "stopped":
+                stopped = True
+        
+        text, trim = self.transcript_buffer.take()
         try:
-            self.status_var.set(status)
+            tk = self.tk
+            
+            if text or trim:
+                # One trim, one insert and one scroll for the whole batch
+                self.transcript.config(state=tk.NORMAL)
+                if trim:
+                    self.transcript.delete("1.0", f"{trim + 1}.0")
+                if text:
+                    self.transcript.insert(tk.END, text)
+                self.transcript.see(tk.END)
+                self.transcript.config(state=tk.DISABLED)
+            metrics = self.assistant.metrics
+            if status is not None or metrics.updates != self._metrics_seen:
+                # Live latency readout of the last turn next to the status
+                self._metrics_seen = metrics.updates
+                readout = metrics.readout(STAGES)
+                self.status_var.set(f"{self._status}    {readout}" if readout else self._status)
         except:
-            print(f"Status: {status}")
+            if text:
+                print(text.rstrip())
+            if status is not None:
+                print(f"Status: {status}")
+        
+        if stopped and self.is_running:
+            self.stop_assistant()
+        self.root.after(UI_POLL_MS, self._drain_ui_updates)
     
     def show_help(self):
         """Show available commands"""
@@ -465,22 +868,34 @@ class VoiceAssistantGUI:
                 command = self.assistant.listen()
                 
                 if command and self.is_running:
-                    self.root.after(1, lambda cmd=command: self._process_command(cmd))
+                    self.commands.put(("command", command))
                     
             except Exception as e:
                 print(f"Error in listen loop: {e}")
     
+    def _dispatch_loop(self):
+        """Worker thread: run queued commands and speak replies off the UI thread"""
+        while True:
+            kind, text = self.commands.get()
+            if kind == "say":
+                self.assistant.speak(text)
+            elif self.is_running:
+                self._process_command(text)
+    
     def _process_command(self, command):
         """Process the voice command and update GUI"""
         try:
             self.update_transcript(command)
             response = self.assistant.process_command(command)
             self.update_transcript(response, speaker=self.assistant.name)
+            self.update_status("Speaking...")
             self.assistant.speak(response)
             
             # Check if assistant was stopped
             if "stopping" in response.lower() or "goodbye" in response.lower():
-                self.stop_assistant()
+                self.ui_updates.put(("stopped", None))
+            elif self.is_running:
+                self.update_status("Listening...")
                 
         except Exception as e:
             print(f"Error processing command: {e}")
@@ -498,28 +913,51 @@ class VoiceAssistantGUI:
         self.start_button.config(text="Stop Listening")
         self.update_status("Listening...")
         
-        # Start background thread for listening
-        self.listen_thread = Thread(target=self._listen_loop)
-        self.listen_thread.daemon = True
-        self.listen_thread.start()
+        # Start background thread for listening (a listener from a quick stop/start
+        # is still inside listen() and simply carries on)
+        if self.listen_thread is None or not self.listen_thread.is_alive():
+            self.listen_thread = Thread(target=self._listen_loop)
+            self.listen_thread.daemon = True
+            self.listen_thread.start()
         
-        # Play welcome message
-        welcome = f"Hello! I'm {self.assistant.name}, your voice assistant with over 5000 commands. How can I help you?"
+        # Play welcome message (spoken by the dispatch worker)
+        welcome = self.assistant.welcome_message
         self.update_transcript(welcome, speaker=self.assistant.name)
-        self.assistant.speak(welcome)
+        self.commands.put(("say", welcome))
     
     def stop_assistant(self):
         """Stop the voice assistant"""
         self.is_running = False
+        # Cut off a reply that is still playing; the daemon listener exits after its
+        # current listen() instead of blocking the UI thread on a join
+        self.assistant.stop_speaking()
         
-        if self.listen_thread and self.listen_thread.is_alive():
-            self.listen_thread.join(1.0)  # Wait for thread to finish
-            
         self.start_button.config(text="Start Listening")
         self.update_status("Ready")
 
 def main():
     """Main function to start the assistant"""
+    # --metrics FILE writes stage latencies on exit (.prom for Prometheus text, else JSON)
+    metrics_file = None
+    if "--metrics" in sys.argv[:-1]:
+        metrics_file = sys.argv[sys.argv.index("--metrics") + 1]
+    
+    if "--headless" in sys.argv:
+        # Text-only console mode: type commands, replies are printed
+        VoiceAssistant("Vira", headless=True).start(metrics_file=metrics_file)
+        return
+    
+    if "--wake-word" in sys.argv:
+        # Console mode that only answers after the wake phrase (see wake_word.py)
+        assistant = VoiceAssistant("Vira")
+        try:
+            assistant.enable_wake_word()
+        except (OSError, ValueError) as e:
+            print(f"Could not load wake word templates: {e}. Record them with: python wake_word.py enroll {WAKE_WORD_FILE}")
+            return
+        assistant.start(metrics_file=metrics_file)
+        return
+    
     try:
         # Try to start GUI version
         import tkinter as tk
@@ -531,12 +969,12 @@ def main():
         # Fallback to console version
         print("Tkinter not available. Starting console version.")
         assistant = VoiceAssistant("Vira")
-        assistant.start()
+        assistant.start(metrics_file=metrics_file)
     except Exception as e:
         print(f"Error starting application: {e}")
         print("Starting console version.")
         assistant = VoiceAssistant("Vira")
-        assistant.start()
+        assistant.start(metrics_file=metrics_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
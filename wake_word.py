@@ -0,0 +1,213 @@
+"""
+Local wake-word gate that runs before full speech recognition.
+
+A handful of recordings of the wake phrase are kept as templates of cheap
+per-frame features (log energy, zero-crossing rate and spectral tilt). A
+captured utterance is matched against them with dynamic time warping, and
+only audio that starts with the wake phrase goes on to the recognizer.
+
+    python wake_word.py enroll wake_word.json --samples 3
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import namedtuple
+from audio_capture import SAMPLE_FORMATS
+
+# A wake phrase found at the start of an utterance. end_byte is where it stops in
+# the audio, and command_audio is the rest of the utterance when it holds more speech.
+WakeDetection = namedtuple("WakeDetection", ["distance", "template", "end_byte", "command_audio"])
+
+def frame_features(audio, frame_ms=20):
+    """
+    (log RMS, zero-crossing rate, spectral tilt) for each frame of an AudioData
+
+    Spectral tilt is the log ratio of first-difference energy to energy. It is
+    near 0 for low-pitched sound and approaches log(4) for hiss.
+    """
+    samples = memoryview(audio.frame_data).cast("B").cast(SAMPLE_FORMATS[audio.sample_width])
+    size = max(2, int(audio.sample_rate * frame_ms / 1000))
+    features = []
+    for start in range(0, len(samples) - size + 1, size):
+        frame = samples[start:start + size].tolist()
+        energy = sum(x * x for x in frame)
+        diff = sum((b - a) * (b - a) for a, b in zip(frame, frame[1:]))
+        # Sign changes: a ^ b is negative exactly when a and b differ in sign
+        crossings = sum((a ^ b) < 0 for a, b in zip(frame, frame[1:]))
+        features.append((0.5 * math.log(energy / size + 1.0), crossings / size,
+                         math.log((diff + 1.0) / (energy + 1.0))))
+    return features
+
+class WakeWordDetector:
+    """
+    DTW template matcher for a short wake phrase.
+
+    Features are normalized against the loudest frame and trimmed of leading
+    silence, so the match does not depend on microphone gain. Two cheap checks
+    run before any DTW: the utterance must be loud enough and long enough to
+    contain the phrase. The warping is banded, and its end is left open, so
+    the phrase can be followed by a command in the same utterance. That
+    command's audio is returned for recognition.
+    """
+    def __init__(self, templates=None, threshold=0.3, frame_ms=20, min_rms=200.0, silence_drop=3.5,
+                 stretch=1.6, band=0.25, min_command_seconds=0.25):
+        self.templates = list(templates or [])
+        self.threshold = threshold
+        self.frame_ms = frame_ms
+        # Frames quieter than min_rms, or silence_drop (natural log) below the peak, are silence
+        self.min_rms = min_rms
+        self.silence_drop = silence_drop
+        # How much faster or slower than a template the phrase may be spoken
+        self.stretch = stretch
+        self.band = band
+        self.min_command_seconds = min_command_seconds
+        self.stats = {"checked": 0, "woke": 0, "rejected": 0, "with_command": 0}
+
+    def features(self, audio):
+        """
+        Normalized feature frames and the index of the first voiced frame, or ([], 0) for silence
+        """
+        raw = frame_features(audio, self.frame_ms)
+        floor = math.log(self.min_rms)
+        peak = max((frame[0] for frame in raw), default=0.0)
+        if peak < floor:
+            return [], 0
+
+        silence = max(floor, peak - self.silence_drop)
+        first = next(i for i, frame in enumerate(raw) if frame[0] >= silence)
+        # Scaled so each feature spreads over a roughly similar range
+        frames = [(max(energy - peak, -self.silence_drop) / 2, 4 * crossings, tilt)
+                  for energy, crossings, tilt in raw[first:]]
+        return frames, first
+
+    def trimmed(self, audio):
+        """
+        Voiced feature frames of a recording, without leading or trailing silence
+        """
+        frames, _ = self.features(audio)
+        voiced = [i for i, frame in enumerate(frames) if frame[0] > -self.silence_drop / 2]
+        return frames[:voiced[-1] + 1] if voiced else []
+
+    def enroll(self, audio):
+        """
+        Add a recording of the wake phrase as a template; returns its length in frames
+        """
+        template = self.trimmed(audio)
+        if len(template) < 3:
+            raise ValueError("Wake word sample is silent or too short")
+        self.templates.append(template)
+        return len(template)
+
+    def distance(self, template, frames):
+        """
+        Best (distance, end frame) for the template against a prefix of the frames
+
+        The distance is the banded DTW cost divided by the path length.
+        """
+        n = len(template)
+        m = min(len(frames), int(n * self.stretch) + 1)
+        width = max(2, int(self.band * n))
+        infinity = float("inf")
+        previous = [0.0] + [infinity] * m
+        for i in range(1, n + 1):
+            current = [infinity] * (m + 1)
+            low = max(1, int(i / self.stretch) - width)
+            high = min(m, int(i * self.stretch) + width)
+            t = template[i - 1]
+            for j in range(low, high + 1):
+                f = frames[j - 1]
+                cost = abs(t[0] - f[0]) + abs(t[1] - f[1]) + abs(t[2] - f[2])
+                current[j] = cost + min(previous[j], current[j - 1], previous[j - 1])
+            previous = current
+
+        best = (infinity, 0)
+        for j in range(max(1, int(n / self.stretch)), m + 1):
+            if previous[j] < infinity:
+                best = min(best, (previous[j] / (n + j), j))
+        return best
+
+    def detect(self, audio):
+        """
+        Return a WakeDetection if the audio starts with the wake phrase, else None
+        """
+        if not self.templates:
+            raise ValueError("No wake word templates enrolled")
+        self.stats["checked"] += 1
+        frames, first = self.features(audio)
+        shortest = min(len(template) for template in self.templates)
+        if len(frames) < shortest / self.stretch:
+            self.stats["rejected"] += 1
+            return None
+
+        best = None
+        for index, template in enumerate(self.templates):
+            distance, end = self.distance(template, frames)
+            if best is None or distance < best[0]:
+                best = (distance, index, end)
+        distance, index, end = best
+        if distance > self.threshold:
+            self.stats["rejected"] += 1
+            return None
+
+        self.stats["woke"] += 1
+        frame_bytes = int(audio.sample_rate * self.frame_ms / 1000) * audio.sample_width
+        end_byte = (first + end) * frame_bytes
+        command_audio = None
+        voiced = sum(frame[0] > -self.silence_drop / 2 for frame in frames[end:])
+        if voiced * self.frame_ms / 1000 >= self.min_command_seconds:
+            import speech_recognition as sr
+            self.stats["with_command"] += 1
+            command_audio = sr.AudioData(audio.frame_data[end_byte:], audio.sample_rate, audio.sample_width)
+        return WakeDetection(distance, index, end_byte, command_audio)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({"frame_ms": self.frame_ms, "threshold": self.threshold,
+                       "templates": self.templates}, f)
+
+    @classmethod
+    def load(cls, path, **options):
+        """
+        Load templates saved by save(); options override the stored settings
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        settings = {"frame_ms": data.get("frame_ms", 20), "threshold": data.get("threshold", 0.3)}
+        settings.update(options)
+        templates = [[tuple(frame) for frame in template] for template in data["templates"]]
+        return cls(templates, **settings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record wake word templates from the microphone.")
+    parser.add_argument("command", choices=["enroll"])
+    parser.add_argument("templates", help="JSON file to add the templates to")
+    parser.add_argument("--samples", type=int, default=3, help="how many times to say the wake word")
+    args = parser.parse_args(argv)
+
+    import speech_recognition as sr
+
+    detector = WakeWordDetector.load(args.templates) if os.path.exists(args.templates) else WakeWordDetector()
+    recognizer = sr.Recognizer()
+    with sr.Microphone() as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for number in range(1, args.samples + 1):
+            print(f"Say the wake word ({number}/{args.samples})...")
+            try:
+                frames = detector.enroll(recognizer.listen(source, timeout=5, phrase_time_limit=3))
+                print(f"Recorded {frames * detector.frame_ms} ms")
+            except (sr.WaitTimeoutError, ValueError) as e:
+                print(f"Skipped: {e}")
+
+    # Distances between the samples give a feel for a sensible threshold
+    templates = detector.templates
+    for i, template in enumerate(templates):
+        for other in templates[i + 1:]:
+            print(f"Template distance: {detector.distance(template, other)[0]:.3f}")
+    detector.save(args.templates)
+    print(f"{len(templates)} templates saved to {args.templates}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())